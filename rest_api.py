@@ -5,11 +5,16 @@ import os
 # Add web-mining directory to sys.path to allow imports from moved files
 sys.path.append(os.path.join(os.path.dirname(__file__), 'web-mining'))
 
-from bm25_implementation import compute_bm25, normalize
-from config import DB_CONFIG
+from bm25_implementation import compute_bm25, get_posting_index
+from bm25_topk import estimate_matches
+from db_pool import get_pool, PoolTimeout
+from doc_metadata import get_doc_metadata
+from static_scores import get_static_scores
+from fusion import fuse, FUSION_METHODS
+from result_cache import RankedResults, cache_key, get_result_cache
+from term_stats import get_term_stats
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import psycopg2
 import numpy as np
 from collections import defaultdict
 
@@ -24,8 +29,96 @@ CORS(app, resources={
     }
 })
 
-def get_db_connection():
-    return psycopg2.connect(**DB_CONFIG)
+def db_connection():
+    """
+    Havuzdan bağlantı; with bloğundan nasıl çıkılırsa çıkılsın geri verilir
+    """
+    return get_pool().connection()
+
+@app.errorhandler(PoolTimeout)
+def pool_timeout(error):
+    return jsonify({"error": "Veritabanı meşgul, lütfen tekrar deneyin."}), 503
+
+@app.route("/pool-metrics", methods=["GET"])
+def pool_metrics():
+    return jsonify(get_pool().metrics())
+
+@app.route("/cache-metrics", methods=["GET"])
+def cache_metrics():
+    return jsonify(get_result_cache().metrics())
+
+# /search'te ilk istekte hesaplanan en az sonuç sayısı; sonraki sayfalar
+# çoğunlukla önbellekten gelir
+SEARCH_DEPTH = 100
+
+def index_generation(index):
+    """
+    Sonuç önbelleğinin geçerliliği için index generation'ı. index,
+    get_posting_index'in diskten yeniden açtığı güncel index'tir; version
+    index her yeniden kurulduğunda değişir. Veritabanı yolunda corpus_stats
+    en fazla STATS_CHECK_INTERVAL'da bir sorulur.
+    """
+    if index is not None:
+        return index.generation, index.version
+    term_stats = get_term_stats()
+    if not term_stats.is_fresh():
+        with db_connection() as conn, conn.cursor() as cursor:
+            term_stats.refresh(cursor)
+    return term_stats.generation
+
+def static_scores():
+    """
+    PageRank/HITS store'u; score_generations en fazla STATS_CHECK_INTERVAL'da
+    bir sorulur
+    """
+    scores = get_static_scores()
+    if not scores.is_fresh():
+        with db_connection() as conn, conn.cursor() as cursor:
+            scores.refresh(cursor)
+    return scores
+
+def ranking_generation(index):
+    """
+    Hibrit sıralamalar BM25 index'ine ve PageRank/HITS skorlarına bağlıdır;
+    biri değişince önbellekteki sıralama geçersiz olur. Sadece BM25 kullanan
+    /search index_generation ile yetinir.
+    """
+    return index_generation(index), static_scores().generation
+
+def page_metadata(doc_ids):
+    """
+    Sadece döndürülen sayfanın url/title'ı; önce process içi önbelleğe,
+    eksikler için dar doc_metadata tablosuna bakılır
+    """
+    store = get_doc_metadata()
+    doc_meta, missing = store.cached(doc_ids)
+    if missing:
+        with db_connection() as conn, conn.cursor() as cursor:
+            doc_meta.update(store.fetch(cursor, missing))
+    return doc_meta
+
+def render_page(ranked, page, per_page):
+    start_idx = (page - 1) * per_page
+    page_results = ranked.page(start_idx, start_idx + per_page)
+    doc_meta = page_metadata([doc_id for doc_id, _ in page_results])
+    results = [{
+        "doc_id": doc_id,
+        "score": score,
+        "url": doc_meta.get(doc_id, {}).get("url"),
+        "title": doc_meta.get(doc_id, {}).get("title")
+    } for doc_id, score in page_results]
+
+    return jsonify({
+        "results": results,
+        "pagination": {
+            "current_page": page,
+            "total_pages": (ranked.total + per_page - 1) // per_page,
+            "total_results": ranked.total,
+            # True ise total_results bir alt sınırdır (çok terimli top-k)
+            "estimated": not ranked.total_exact,
+            "per_page": per_page
+        }
+    })
 
 @app.route("/are-you-alive", methods=["GET"])
 def are_you_alive():
@@ -43,55 +136,38 @@ def search():
     if page < 1:
         return jsonify({"error": "Sayfa numarası 1'den küçük olamaz."}), 400
 
-    conn = get_db_connection()
     query_tokens = preprocess_text(query)
-    bm25_results = compute_bm25(query_tokens, conn)
-    bm25_dict = dict(bm25_results) # doc_id -> score
-    doc_ids = tuple(bm25_dict.keys())
-
-    if not doc_ids:
-        conn.close()
-        return jsonify({"results": [], "pagination": {"current_page": page, "total_pages": 0, "total_results": 0, "per_page": per_page}})
-
-    cursor = conn.cursor()
-    # Title ve URL
-    cursor.execute(
-        f"SELECT id, url, title FROM pages WHERE id IN %s;",
-        (doc_ids,)
-    )
-    doc_meta = {row[0]: {"url": row[1], "title": row[2]} for row in cursor.fetchall()}
-    cursor.close()
-    conn.close()
-
-    # Results list
-    search_results = []
-    for doc_id, score in bm25_dict.items():
-        search_results.append({
-            "doc_id": doc_id,
-            "score": score,
-            "url": doc_meta.get(doc_id, {}).get("url"),
-            "title": doc_meta.get(doc_id, {}).get("title")
-        })
-
-    search_results.sort(key=lambda x: x["score"], reverse=True)
-
-    # Pagination
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    total_results = len(search_results)
-    total_pages = (total_results + per_page - 1) // per_page
-
-    paginated_results = search_results[start_idx:end_idx]
-
-    return jsonify({
-        "results": paginated_results,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_results": total_results,
-            "per_page": per_page
-        }
-    })
+    index = get_posting_index()
+    cache = get_result_cache()
+    key = cache_key(query_tokens, "bm25")
+    generation = index_generation(index)
+    end_idx = page * per_page
+
+    ranked = cache.get(key, generation)
+    if ranked is None or not ranked.covers(end_idx):
+        if index is not None:
+            # Sadece ilk depth sonuç hesaplanır (top-k); daha ileri bir sayfa
+            # istenirse derinlik artırılarak yeniden hesaplanır
+            depth = max(end_idx, SEARCH_DEPTH, 2 * len(ranked) if ranked is not None else 0)
+            bm25_results = compute_bm25(query_tokens, None, index=index, top_k=depth)
+            complete = len(bm25_results) < depth
+            if complete:
+                total_results, total_exact = len(bm25_results), True
+            else:
+                total_results, total_exact = estimate_matches(index, query_tokens)
+                total_results = max(total_results, len(bm25_results))
+        else:
+            with db_connection() as conn:
+                bm25_results = compute_bm25(query_tokens, conn)
+            complete = True
+            total_results, total_exact = len(bm25_results), True
+        ranked = RankedResults(bm25_results, total_results, complete, generation, total_exact)
+        cache.put(key, ranked)
+
+    if not len(ranked):
+        return jsonify({"results": [], "pagination": {"current_page": page, "total_pages": 0, "total_results": 0, "estimated": False, "per_page": per_page}})
+
+    return render_page(ranked, page, per_page)
 
 
 @app.route("/advanced-search", methods=["GET"])
@@ -100,6 +176,7 @@ def advanced_search():
     alpha = float(request.args.get("alpha", 0.6))
     beta = float(request.args.get("beta", 0.3))
     gamma = float(request.args.get("gamma", 0.1))
+    method = request.args.get("fusion", "minmax")
     page = int(request.args.get("page", 1))
     per_page = 10
 
@@ -109,79 +186,43 @@ def advanced_search():
     if not abs((alpha + beta + gamma) - 1.0) < 1e-5:
         return jsonify({"error": "alpha + beta + gamma = 1 olmalıdır."}), 400
 
+    if method not in FUSION_METHODS:
+        return jsonify({"error": f"fusion şunlardan biri olmalıdır: {', '.join(FUSION_METHODS)}."}), 400
+
     if page < 1:
         return jsonify({"error": "Sayfa numarası 1'den küçük olamaz."}), 400
 
-    conn = get_db_connection()
     query_tokens = preprocess_text(query)
-    bm25_results = compute_bm25(query_tokens, conn)
-    bm25_dict = dict(bm25_results)
-    doc_ids = tuple(bm25_dict.keys())
-
-    if not doc_ids:
+    index = get_posting_index()
+    cache = get_result_cache()
+    key = cache_key(query_tokens, "hybrid", method, alpha, beta, gamma)
+    generation = ranking_generation(index)
+    end_idx = page * per_page
+
+    ranked = cache.get(key, generation)
+    if ranked is None or not ranked.covers(end_idx):
+        if index is not None:
+            bm25_results = compute_bm25(query_tokens, None, index=index)
+        else:
+            with db_connection() as conn:
+                bm25_results = compute_bm25(query_tokens, conn)
+        bm25_dict = dict(bm25_results)
+        doc_ids = list(bm25_dict.keys())
+
+        # PageRank ve HITS bellekteki store'dan, veritabanına gitmeden
+        # okunur; sadece ilk depth sonuç sıralanır
+        scores = get_static_scores()
+        signals = [
+            list(bm25_dict.values()),
+            scores["pagerank"].gather(doc_ids),
+            scores["hits"].gather(doc_ids),
+        ]
+        depth = max(end_idx, SEARCH_DEPTH, 2 * len(ranked) if ranked is not None else 0)
+        hybrid_results = fuse(doc_ids, signals, [alpha, beta, gamma], method, depth)
+        ranked = RankedResults(hybrid_results, len(doc_ids), len(doc_ids) <= depth, generation)
+        cache.put(key, ranked)
+
+    if not len(ranked):
         return jsonify([])
 
-    cursor = conn.cursor()
-
-    # 2. PageRank skorlarını al
-    cursor.execute(
-        f"SELECT doc_id, score FROM pagerank WHERE doc_id IN %s;",
-        (doc_ids,)
-    )
-    pagerank_scores = dict(cursor.fetchall())
-
-    # 3. HITS authority skorlarını al
-    cursor.execute(
-        f"SELECT doc_id, authority_score FROM hits WHERE doc_id IN %s;",
-        (doc_ids,)
-    )
-    hits_scores = dict(cursor.fetchall())
-
-    # Title ve URL (isteğe bağlı)
-    cursor.execute(
-        f"SELECT id, url, title FROM pages WHERE id IN %s;",
-        (doc_ids,)
-    )
-    doc_meta = {row[0]: {"url": row[1], "title": row[2]} for row in cursor.fetchall()}
-    cursor.close()
-    conn.close()
-
-    # Normalize
-    bm25_norm = normalize(bm25_dict)
-    pagerank_norm = normalize(pagerank_scores)
-    hits_norm = normalize(hits_scores)
-
-    # Hybrid skor hesapla
-    hybrid_results = []
-    for doc_id in bm25_dict:
-        score = (
-            alpha * bm25_norm.get(doc_id, 0) +
-            beta * pagerank_norm.get(doc_id, 0) +
-            gamma * hits_norm.get(doc_id, 0)
-        )
-        hybrid_results.append({
-            "doc_id": doc_id,
-            "score": score,
-            "url": doc_meta.get(doc_id, {}).get("url"),
-            "title": doc_meta.get(doc_id, {}).get("title")
-        })
-
-    hybrid_results.sort(key=lambda x: x["score"], reverse=True)
-
-    # Pagination hesapla
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
-    total_results = len(hybrid_results)
-    total_pages = (total_results + per_page - 1) // per_page
-
-    paginated_results = hybrid_results[start_idx:end_idx]
-
-    return jsonify({
-        "results": paginated_results,
-        "pagination": {
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_results": total_results,
-            "per_page": per_page
-        }
-    })
+    return render_page(ranked, page, per_page)
@@ -0,0 +1,55 @@
+import argparse
+import os
+import time
+from db_pool import get_pool
+from text_preprocessing import preprocess_text
+from bm25_implementation import compute_bm25, compute_bm25_index
+from bm25_numpy import CsrBm25
+from posting_index import PostingIndex, INDEX_DIR
+from benchmark_posting_index import load_queries
+from benchmark_topk import frequent_term_queries
+
+def report(name, queries, elapsed):
+    print(f"{name:<22} {len(queries) / elapsed:>10,.1f} queries/sec  ({elapsed:.2f}s)")
+
+def time_loop(name, queries, search):
+    start = time.perf_counter()
+    results = [search(tokens) for tokens in queries]
+    report(name, queries, time.perf_counter() - start)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Python döngülü ve NumPy CSR BM25 skorlamasının karşılaştırması")
+    parser.add_argument("--index-dir", default=os.getenv("BM25_INDEX_DIR", INDEX_DIR))
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=300, help="Sık terimlerden üretilecek sorgu sayısı")
+    parser.add_argument("--with-db", action="store_true", help="Postgres üzerindeki compute_bm25'i de ölç")
+    args = parser.parse_args()
+
+    index = PostingIndex(args.index_dir)
+    start = time.perf_counter()
+    engine = CsrBm25.from_posting_index(index)
+    print(f"CSR load: {time.perf_counter() - start:.2f}s, {len(engine.doc_nums)} postings")
+
+    queries = [preprocess_text(query) for query in load_queries()]
+    queries += frequent_term_queries(index, args.queries, 3, 500)
+    print(f"{len(queries)} queries, k={args.k}\n")
+
+    if args.with_db:
+        conn = get_pool().getconn()
+        try:
+            time_loop("postgres", queries, lambda tokens: compute_bm25(tokens, conn)[:args.k])
+        finally:
+            get_pool().putconn(conn)
+    reference = time_loop("mmap index", queries, lambda tokens: compute_bm25_index(tokens, index)[:args.k])
+    time_loop("csr score", queries, lambda tokens: engine.score(tokens, args.k))
+
+    start = time.perf_counter()
+    batch = engine.score_batch(queries, args.k)
+    report("csr score_batch", queries, time.perf_counter() - start)
+
+    same = sum(
+        [round(score, 9) for _, score in a] == [round(score, 9) for _, score in b]
+        for a, b in zip(reference, batch)
+    )
+    print(f"\nidentical top {args.k} scores: {same}/{len(queries)}")
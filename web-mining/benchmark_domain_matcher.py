@@ -0,0 +1,53 @@
+import argparse
+import gzip
+import time
+from warcio.archiveiterator import ArchiveIterator
+from domain_matcher import DomainMatcher
+from download import get_target_urls
+
+def read_response_urls(warc_file):
+    """
+    Collect the WARC-Target-URI of every response record, so that the
+    filters are timed without decompression and parsing
+    """
+    urls = []
+    with gzip.open(warc_file, 'rb') as stream:
+        for record in ArchiveIterator(stream):
+            if record.rec_type == 'response':
+                urls.append(record.rec_headers.get_header('WARC-Target-URI') or '')
+    return urls
+
+def time_filter(name, urls, predicate, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matched = [url for url in urls if predicate(url)]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<10} {len(urls) / best:>14,.0f} records/sec  ({len(matched)} matches, {best:.3f}s)")
+    return matched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the substring URL filter with DomainMatcher")
+    parser.add_argument("warc_file", help="Sample .warc.gz file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    target_urls = get_target_urls()
+    urls = read_response_urls(args.warc_file)
+    print(f"{len(urls)} response records, {len(target_urls)} domains\n")
+
+    old = time_filter("substring", urls,
+                      lambda url: any(target_url in url for target_url in target_urls),
+                      args.repeat)
+    matcher = DomainMatcher(target_urls)
+    new = time_filter("matcher", urls, matcher.match, args.repeat)
+
+    old_only = sorted(set(old) - set(new))
+    new_only = sorted(set(new) - set(old))
+    print(f"\nOnly substring filter: {len(old_only)} (false positives such as domains in paths)")
+    for url in old_only[:10]:
+        print(f"  {url}")
+    print(f"Only matcher: {len(new_only)} (punycoded hosts)")
+    for url in new_only[:10]:
+        print(f"  {url}")
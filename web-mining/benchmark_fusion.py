@@ -0,0 +1,62 @@
+import argparse
+import statistics
+import time
+import numpy as np
+from bm25_implementation import normalize
+from fusion import fuse
+
+def dict_fusion(bm25_dict, pagerank_scores, hits_scores, alpha, beta, gamma):
+    """
+    Eski hibrit skorlama: üç normalize ve bütün adayların tam sıralaması
+    """
+    bm25_norm = normalize(bm25_dict)
+    pagerank_norm = normalize(pagerank_scores)
+    hits_norm = normalize(hits_scores)
+    hybrid_scores = {}
+    for doc_id in bm25_dict:
+        hybrid_scores[doc_id] = (
+            alpha * bm25_norm.get(doc_id, 0) +
+            beta * pagerank_norm.get(doc_id, 0) +
+            gamma * hits_norm.get(doc_id, 0)
+        )
+    return sorted(hybrid_scores.items(), key=lambda x: x[1], reverse=True)
+
+def time_runs(name, run, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = run()
+        timings.append(time.perf_counter() - start)
+    print(f"{name:<24} median {1000 * statistics.median(timings):8.2f} ms   min {1000 * min(timings):8.2f} ms")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hibrit skor birleştirme: dict döngüsü ile fusion.fuse karşılaştırması")
+    parser.add_argument("--candidates", type=int, default=50_000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--coverage", type=float, default=0.8,
+                        help="PageRank/HITS skoru olan adayların oranı")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    doc_ids = rng.choice(10 * args.candidates, args.candidates, replace=False)
+    bm25 = rng.gamma(2.0, 3.0, args.candidates)
+    pagerank = np.where(rng.random(args.candidates) < args.coverage, rng.pareto(2.0, args.candidates), np.nan)
+    hits = np.where(rng.random(args.candidates) < args.coverage, rng.pareto(3.0, args.candidates), np.nan)
+    weights = [0.6, 0.3, 0.1]
+
+    bm25_dict = dict(zip(doc_ids.tolist(), bm25.tolist()))
+    pagerank_scores = {d: s for d, s in zip(doc_ids.tolist(), pagerank.tolist()) if not np.isnan(s)}
+    hits_scores = {d: s for d, s in zip(doc_ids.tolist(), hits.tolist()) if not np.isnan(s)}
+    signals = [bm25, pagerank, hits]
+
+    print(f"{args.candidates} candidates, top-{args.k}\n")
+    reference = time_runs("dict loop + sorted", lambda: dict_fusion(bm25_dict, pagerank_scores, hits_scores, *weights),
+                          args.repeats)
+    fused = time_runs("fuse minmax, top-k", lambda: fuse(doc_ids, signals, weights, "minmax", args.k), args.repeats)
+    time_runs("fuse minmax, full sort", lambda: fuse(doc_ids, signals, weights, "minmax"), args.repeats)
+    time_runs("fuse rrf, top-k", lambda: fuse(doc_ids, signals, weights, "rrf", args.k), args.repeats)
+
+    same = [d for d, _ in fused] == [d for d, _ in reference[:args.k]]
+    print(f"\ntop-{args.k} identical to dict loop: {same}")
@@ -0,0 +1,102 @@
+import argparse
+import time
+import tracemalloc
+import networkx as nx
+import numpy as np
+from graph_rank import LinkGraph, pagerank, hits, warm_start
+
+def synthetic_edges(nodes, edges, seed=0):
+    """
+    Hedefleri Pareto dağılımlı (az sayıda çok link alan sayfa) rastgele graf
+    """
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(1, nodes + 1, edges)
+    targets = (rng.pareto(1.2, edges) * nodes / 50).astype(np.int64) % nodes + 1
+    return sources, targets
+
+def database_edges():
+    from db_pool import connection
+    from link_graph import build_link_graph
+
+    with connection() as conn:
+        graph = build_link_graph(conn)
+    coo = graph.adjacency.tocoo()
+    return graph.doc_ids[coo.row], graph.doc_ids[coo.col]
+
+def measure(name, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {elapsed:8.2f}s   peak {peak / 2**20:8.1f} MB")
+    return result
+
+def networkx_run(sources, targets):
+    G = nx.DiGraph()
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        G.add_edge(source, target)
+    pagerank_scores = nx.pagerank(G, alpha=0.85)
+    hubs, authorities = nx.hits(G, max_iter=1000, normalized=True)
+    return pagerank_scores, authorities
+
+def sparse_run(sources, targets):
+    graph = LinkGraph(sources, targets)
+    pagerank_scores, pagerank_stats = pagerank(graph)
+    hubs, authorities, hits_stats = hits(graph)
+    return graph.to_dict(pagerank_scores), graph.to_dict(authorities), pagerank_stats, hits_stats
+
+def max_difference(a, b):
+    return max((abs(a[node] - b[node]) for node in a), default=0.0)
+
+def compare_warm_start(sources, targets, growth, tol):
+    """
+    En büyük id'li growth oranındaki düğümler "yeni ingest" sayılır: önce
+    onlarsız graf, sonra tam graf düz ve önceki skorlardan başlayarak
+    hesaplanır
+    """
+    cutoff = np.quantile(np.concatenate([sources, targets]), 1 - growth)
+    old = (sources < cutoff) & (targets < cutoff)
+    old_graph = LinkGraph(sources[old], targets[old])
+    graph = LinkGraph(sources, targets)
+    print(f"\nwarm start: {old_graph.node_count} → {graph.node_count} nodes, "
+          f"{old_graph.edge_count} → {graph.edge_count} edges, tol={tol:g}")
+
+    old_pagerank, _ = pagerank(old_graph, tol=tol, max_iter=1000)
+    _, old_authorities, _ = hits(old_graph, tol=tol)
+    cold_pagerank, cold_stats = pagerank(graph, tol=tol, max_iter=1000)
+    nstart, _ = warm_start(graph, old_graph.to_dict(old_pagerank), 0.15 / graph.node_count)
+    warm_pagerank, warm_stats = pagerank(graph, tol=tol, max_iter=1000, nstart=nstart)
+    print(f"  pagerank  cold {cold_stats['iterations']:4d} iterations   warm {warm_stats['iterations']:4d} iterations   "
+          f"max diff {np.abs(cold_pagerank - warm_pagerank).max():.1e}")
+
+    _, cold_authorities, cold_stats = hits(graph, tol=tol)
+    nstart, _ = warm_start(graph, old_graph.to_dict(old_authorities))
+    _, warm_authorities, warm_stats = hits(graph, tol=tol, nstart=nstart)
+    print(f"  hits      cold {cold_stats['iterations']:4d} iterations   warm {warm_stats['iterations']:4d} iterations   "
+          f"max diff {np.abs(cold_authorities - warm_authorities).max():.1e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="networkx ile SciPy CSR PageRank/HITS karşılaştırması")
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--edges", type=int, default=2_000_000)
+    parser.add_argument("--from-db", action="store_true", help="Sentetik graf yerine pages_cleaned.links")
+    parser.add_argument("--skip-networkx", action="store_true")
+    parser.add_argument("--warm-start", type=float, metavar="GROWTH", default=None,
+                        help="Düğümlerin bu oranı yeni eklenmiş gibi düz / warm start iterasyonlarını karşılaştır")
+    parser.add_argument("--warm-tol", type=float, default=1e-10)
+    args = parser.parse_args()
+
+    sources, targets = database_edges() if args.from_db else synthetic_edges(args.nodes, args.edges)
+    print(f"{len(sources)} edges\n")
+
+    pagerank_scores, authorities, pagerank_stats, hits_stats = measure("scipy csr", lambda: sparse_run(sources, targets))
+    print(f"  pagerank: {pagerank_stats['iterations']} iterations, hits: {hits_stats['iterations']} iterations")
+    if not args.skip_networkx:
+        nx_pagerank, nx_authorities = measure("networkx", lambda: networkx_run(sources, targets))
+        print(f"\nmax |pagerank diff|:  {max_difference(pagerank_scores, nx_pagerank):.2e}")
+        print(f"max |authority diff|: {max_difference(authorities, nx_authorities):.2e}")
+
+    if args.warm_start:
+        compare_warm_start(np.asarray(sources), np.asarray(targets), args.warm_start, args.warm_tol)
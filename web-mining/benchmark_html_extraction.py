@@ -0,0 +1,39 @@
+import argparse
+import time
+from db_pool import get_pool
+from html_extraction import extract_page_content, _extract_with_bs4, etree
+
+def load_sample(limit):
+    conn = get_pool().getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT url, html FROM pages ORDER BY id LIMIT %s", (limit,))
+            return cur.fetchall()
+    finally:
+        get_pool().putconn(conn)
+
+def time_extractor(name, rows, extractor):
+    start = time.perf_counter()
+    results = [extractor(html or '', url) for url, html in rows]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<14} {len(rows) / elapsed:>10,.1f} pages/sec  ({elapsed:.2f}s)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare BeautifulSoup and lxml HTML extraction on stored pages")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = load_sample(args.limit)
+    print(f"{len(rows)} pages, lxml {'available' if etree is not None else 'NOT installed'}\n")
+
+    old = time_extractor("bs4 (2 parses)", rows,
+                         lambda html, url: (_extract_with_bs4(html, url), _extract_with_bs4(html, url)))
+    old = [first for first, _ in old]
+    new = time_extractor("single pass", rows, extract_page_content)
+
+    same_text = sum(a.text == b.text for a, b in zip(old, new))
+    same_links = sum(a.links == b.links for a, b in zip(old, new))
+    same_title = sum((a.title or '') == (b.title or '') for a, b in zip(old, new))
+    print(f"\nIdentical text: {same_text}/{len(rows)}, links: {same_links}/{len(rows)}, "
+          f"title: {same_title}/{len(rows)}")
@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+import numpy as np
+from text_preprocessing import preprocess_text
+from bm25_implementation import compute_bm25_index
+from bm25_numpy import CsrBm25
+from posting_index import PostingIndex, INDEX_DIR
+from benchmark_posting_index import load_queries
+from benchmark_topk import frequent_term_queries
+
+def time_run(name, run):
+    start = time.perf_counter()
+    results = run()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f}s")
+    return results
+
+def overlap(a, b, k):
+    return np.mean([len({d for d, _ in x[:k]} & {d for d, _ in y[:k]}) / k for x, y in zip(a, b) if x])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BM25'i baştan hesaplama ile nicemlenmiş impact toplama karşılaştırması")
+    parser.add_argument("--index-dir", default=os.getenv("BM25_INDEX_DIR", INDEX_DIR))
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    index = PostingIndex(args.index_dir)
+    if index.impacts is None:
+        parser.error(f"{args.index_dir} impact'siz kurulmuş; python posting_index.py --impacts ile yeniden kurun")
+    size = os.path.getsize(os.path.join(args.index_dir, "impacts.bin"))
+    print(f"impacts.bin: {size / 2**20:,.1f} MB ({index.meta['impact_bits']} bit, "
+          f"k1={index.k1}, b={index.b})")
+
+    queries = [preprocess_text(query) for query in load_queries()]
+    queries += frequent_term_queries(index, args.queries, 3, 500)
+    print(f"{len(queries)} queries\n")
+
+    exact = time_run("mmap, recompute", lambda: [compute_bm25_index(q, index, use_impacts=False) for q in queries])
+    quantized = time_run("mmap, impacts", lambda: [compute_bm25_index(q, index) for q in queries])
+
+    recompute_engine = CsrBm25.from_posting_index(index, use_impacts=False)
+    impact_engine = CsrBm25.from_posting_index(index)
+    time_run("csr batch, recompute", lambda: recompute_engine.score_batch(queries, args.k))
+    time_run("csr batch, impacts", lambda: impact_engine.score_batch(queries, args.k))
+
+    print(f"\noverlap@{args.k} with exact scores: {overlap(exact, quantized, args.k):.3f}")
@@ -0,0 +1,64 @@
+import argparse
+import csv
+import os
+import statistics
+import time
+from db_pool import get_pool
+from text_preprocessing import preprocess_text
+from bm25_implementation import compute_bm25
+from posting_index import PostingIndex, INDEX_DIR
+
+LABELS_FILE = os.path.join(os.path.dirname(__file__), "..", "relevance_labels.csv")
+
+def load_queries():
+    with open(LABELS_FILE, encoding="utf-8-sig") as f:
+        return sorted({row["query"] for row in csv.DictReader(f, delimiter=";")})
+
+def time_queries(name, queries, search, repeat):
+    latencies = []
+    results = []
+    for query in queries:
+        tokens = preprocess_text(query)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = search(tokens)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append(result)
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<10} mean {statistics.mean(latencies):8.2f} ms  p50 {statistics.median(latencies):8.2f} ms  "
+          f"p95 {p95:8.2f} ms")
+    return results
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Postgres ve memory-mapped index ile BM25 sorgu süresi / index boyutu")
+    parser.add_argument("--index-dir", default=os.getenv("BM25_INDEX_DIR", INDEX_DIR))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("queries", nargs="*", help="Varsayılan: relevance_labels.csv'deki sorgular")
+    args = parser.parse_args()
+
+    queries = args.queries or load_queries()
+    index = PostingIndex(args.index_dir)
+    conn = get_pool().getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_total_relation_size('inverted_index') + pg_total_relation_size('doc_lengths')")
+            pg_size = cur.fetchone()[0]
+        print(f"{len(queries)} queries x {args.repeat}\n")
+
+        pg_results = time_queries("postgres", queries, lambda tokens: compute_bm25(tokens, conn), args.repeat)
+        mm_results = time_queries("mmap", queries, lambda tokens: compute_bm25(tokens, None, index=index), args.repeat)
+    finally:
+        get_pool().putconn(conn)
+
+    mm_size = directory_size(args.index_dir)
+    print(f"\nindex size: postgres {pg_size / 2**20:,.1f} MB, mmap {mm_size / 2**20:,.1f} MB")
+
+    same = sum(
+        [doc_id for doc_id, _ in a[:10]] == [doc_id for doc_id, _ in b[:10]]
+        for a, b in zip(pg_results, mm_results)
+    )
+    print(f"identical top 10: {same}/{len(queries)}")
@@ -0,0 +1,51 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_import(module, runs):
+    """
+    Her çalıştırma temiz bir interpreter'da yapılır; süreler saniye cinsinden
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+def top_imports(module, limit):
+    """
+    python -X importtime çıktısından en pahalı (kümülatif) üst düzey import'lar
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Modülün kendisi (derinlik 0) ve doğrudan import ettikleri (derinlik 1)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="REST API (ya da başka bir modülün) import süresini ölçer")
+    parser.add_argument("--module", default="rest_api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = time_import(args.module, args.runs)
+    print(f"import {args.module}: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms ({args.runs} runs)\n")
+
+    print("En pahalı import'lar (kümülatif):")
+    for cumulative_us, name in top_imports(args.module, args.top):
+        print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
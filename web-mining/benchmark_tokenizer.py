@@ -0,0 +1,58 @@
+import argparse
+import string
+import time
+from db_pool import get_pool
+from text_preprocessing import get_stop_words, preprocess_text, preprocess_texts
+from turkish_tokenizer import stem
+
+punctuations = set(string.punctuation)
+
+def whitespace_preprocess_text(text):
+    """
+    Eski preprocess_text: str.lower() + boşlukta bölme + isalpha filtresi
+    """
+    stop_words = get_stop_words()
+    tokens = text.lower().split()
+    return [
+        t for t in tokens
+        if (t not in stop_words and
+            t not in punctuations and
+            t.strip().isalpha() and
+            len(t.strip()) > 1)
+    ]
+
+def load_texts(limit, text_file=None):
+    if text_file:
+        with open(text_file, encoding="utf-8") as f:
+            return [line for line in f if line.strip()][:limit]
+    conn = get_pool().getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT text FROM pages_cleaned ORDER BY id LIMIT %s", (limit,))
+            return [row[0] or '' for row in cur.fetchall()]
+    finally:
+        get_pool().putconn(conn)
+
+def run(name, texts, fn, batch=False):
+    start = time.perf_counter()
+    token_lists = fn(texts) if batch else [fn(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(tokens) for tokens in token_lists)
+    print(f"{name:<22} {tokens / elapsed:>12,.0f} tokens/sec  ({tokens} tokens, {elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eski ve yeni tokenizer'ın tokens/sec karşılaştırması")
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--text-file", help="pages_cleaned yerine satır satır metin dosyası")
+    args = parser.parse_args()
+
+    texts = load_texts(args.limit, args.text_file)
+    print(f"{len(texts)} documents\n")
+
+    run("whitespace (old)", texts, whitespace_preprocess_text)
+    stem.cache_clear()
+    run("tokenizer, cold cache", texts, preprocess_text)
+    run("tokenizer, warm cache", texts, preprocess_text)
+    run("tokenizer, batch", texts, preprocess_texts, batch=True)
+    info = stem.cache_info()
+    print(f"\nstem cache: {info.currsize} entries, hit rate {info.hits / max(1, info.hits + info.misses):.1%}")
@@ -0,0 +1,50 @@
+import argparse
+import os
+import random
+import time
+import numpy as np
+from text_preprocessing import preprocess_text
+from bm25_implementation import compute_bm25_index
+from bm25_topk import search_top_k
+from posting_index import PostingIndex, INDEX_DIR
+from benchmark_posting_index import load_queries
+
+def frequent_term_queries(index, count, terms_per_query, pool_size, seed=0):
+    """
+    En yüksek df'li terimlerden rastgele çok terimli sorgular
+    """
+    pool = np.argsort(-np.asarray(index.dfs))[:pool_size]
+    terms = [index._term_at(int(i)).decode("utf-8") for i in pool]
+    rng = random.Random(seed)
+    return [rng.sample(terms, min(terms_per_query, len(terms))) for _ in range(count)]
+
+def time_queries(name, queries, search):
+    latencies = []
+    results = []
+    for tokens in queries:
+        start = time.perf_counter()
+        results.append(search(tokens))
+        latencies.append((time.perf_counter() - start) * 1000)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:<12} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exhaustive BM25 ile MaxScore top-k karşılaştırması")
+    parser.add_argument("--index-dir", default=os.getenv("BM25_INDEX_DIR", INDEX_DIR))
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Sık terimlerden üretilecek sorgu sayısı")
+    parser.add_argument("--terms", type=int, default=3, help="Üretilen sorgu başına terim")
+    parser.add_argument("--pool", type=int, default=500, help="Sorguların seçileceği en sık terim sayısı")
+    args = parser.parse_args()
+
+    index = PostingIndex(args.index_dir)
+    queries = [preprocess_text(query) for query in load_queries()]
+    queries += frequent_term_queries(index, args.queries, args.terms, args.pool)
+    print(f"{len(queries)} queries, k={args.k}, {index.N} documents\n")
+
+    exhaustive = time_queries("exhaustive", queries, lambda tokens: compute_bm25_index(tokens, index)[:args.k])
+    top_k = time_queries("maxscore", queries, lambda tokens: search_top_k(index, tokens, args.k))
+
+    same = sum([d for d, _ in a] == [d for d, _ in b] for a, b in zip(exhaustive, top_k))
+    print(f"\nidentical top {args.k}: {same}/{len(queries)}")
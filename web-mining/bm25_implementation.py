@@ -1,10 +1,11 @@
 import math
+import os
 from collections import defaultdict
-import pandas as pd
-import psycopg2
-from config import DB_CONFIG
+from db_pool import connection
+from doc_metadata import get_doc_metadata
 from text_preprocessing import preprocess_text
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from term_stats import get_term_stats
+from bm25_topk import search_top_k
 import numpy as np
 
 def normalize(scores_dict):
@@ -16,33 +17,83 @@ def normalize(scores_dict):
         return {k: 0.0 for k in scores_dict}
     return {k: (v - min_v) / (max_v - min_v) for k, v in scores_dict.items()}
 
-def get_links(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT id, url, links FROM pages_cleaned")
-    columns = ['id', 'url', 'links']
-    data = cur.fetchall()
-    return pd.DataFrame(data, columns=columns)
+_index_reloaders = {}
 
-def compute_bm25(query_tokens, conn, k1=1.5, b=0.75):
-    scores = defaultdict(float)
-    cursor = conn.cursor()
+def get_posting_index(index_dir=None):
+    """
+    BM25_INDEX_DIR (ya da verilen dizin) altında bir memory-mapped index
+    varsa onu açar, yoksa None. Index yeniden kurulduğunda en fazla
+    STATS_CHECK_INTERVAL sonra yenisi döner.
+    """
+    from posting_index import IndexReloader, INDEX_DIR
 
-    # Toplam doküman sayısı
-    cursor.execute("SELECT COUNT(*) FROM doc_lengths;")
-    N = cursor.fetchone()[0]
+    index_dir = index_dir or os.getenv("BM25_INDEX_DIR", INDEX_DIR)
+    reloader = _index_reloaders.get(index_dir)
+    if reloader is None:
+        reloader = _index_reloaders.setdefault(index_dir, IndexReloader(index_dir))
+    return reloader.get()
 
-    # Ortalama doküman uzunluğu
-    cursor.execute("SELECT AVG(length) FROM doc_lengths;")
-    avgdl = float(cursor.fetchone()[0])
+def compute_bm25_index(query_tokens, index, k1=1.5, b=0.75, use_impacts=True):
+    """
+    compute_bm25'in memory-mapped index (posting_index.PostingIndex)
+    üzerinde, veritabanı olmadan çalışan karşılığı.
+
+    Index impact'lerle kurulduysa ve k1/b kurulumdakilerle aynıysa BM25
+    formülü hiç hesaplanmaz, önceden nicemlenmiş katkılar toplanır.
+    Farklı k1/b ya da use_impacts=False ile skorlar baştan hesaplanır.
+    """
+    N, avgdl = index.N, index.avgdl
+    scores = np.zeros(N)
+    impacts = use_impacts and index.impacts is not None and (k1, b) == (index.k1, index.b)
 
     for term in query_tokens:
-        # Belge frekansı (df)
-        cursor.execute("SELECT COUNT(*) FROM inverted_index WHERE term = %s;", (term,))
-        df = cursor.fetchone()[0]
-        if df == 0:
+        i = index.lookup(term)
+        if i is None:
+            continue
+        doc_nums, freqs = index.term_postings(i)
+        if impacts:
+            scores[doc_nums] += index.term_impacts(i)
             continue
+        df = len(doc_nums)
 
         idf = math.log(1 + (N - df + 0.5) / (df + 0.5))
+        doc_len = index.doc_lengths[doc_nums]
+        denom = freqs + k1 * (1 - b + b * doc_len / avgdl)
+        scores[doc_nums] += idf * (freqs * (k1 + 1)) / denom
+
+    matched = np.flatnonzero(scores)
+    order = matched[np.argsort(-scores[matched], kind="stable")]
+    return list(zip(index.doc_ids[order].tolist(), scores[order].tolist()))
+
+def compute_bm25(query_tokens, conn, k1=1.5, b=0.75, index=None, top_k=None):
+    """
+    BM25 sonuçları, skora göre azalan (doc_id, score) listesi.
+
+    index verilirse veritabanı yerine memory-mapped index kullanılır. top_k
+    verilirse sadece ilk top_k sonuç döner; index ile birlikte MaxScore
+    budaması yapılır (bm25_topk). top_k=None tam (exhaustive) skorlamadır,
+    değerlendirme script'leri bunu kullanır.
+    """
+    if index is not None:
+        if top_k is not None:
+            return search_top_k(index, query_tokens, top_k, k1, b)
+        return compute_bm25_index(query_tokens, index, k1, b)
+
+    scores = defaultdict(float)
+    cursor = conn.cursor()
+
+    # N, avgdl ve df'ler index generation'ı değişene kadar önbellekten gelir
+    term_stats = get_term_stats()
+    if not term_stats.refresh(cursor):
+        cursor.close()
+        return []
+    avgdl = term_stats.avgdl
+    stats = term_stats.lookup(cursor, query_tokens)
+
+    for term in query_tokens:
+        if term not in stats:
+            continue
+        _, idf = stats[term]
 
         # Terimi içeren dokümanları ve frekanslarını getir
         cursor.execute("""
@@ -59,18 +110,14 @@ def compute_bm25(query_tokens, conn, k1=1.5, b=0.75):
             scores[doc_id] += score
 
     cursor.close()
-    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return results if top_k is None else results[:top_k]
 
 def get_titles_and_urls(doc_ids):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
     # doc_ids bir liste olmalı, ör: [1, 2, 3]
-    sql = "SELECT id, title, url FROM pages WHERE id = ANY(%s) ORDER BY id"
-    cur.execute(sql, (doc_ids,))
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-    return results
+    with connection() as conn, conn.cursor() as cur:
+        doc_meta = get_doc_metadata().lookup(cur, doc_ids)
+    return [(doc_id, doc_meta[doc_id]["title"], doc_meta[doc_id]["url"]) for doc_id in sorted(doc_meta)]
 
 def calculate_metrics(y_true, y_pred):
     """
@@ -83,6 +130,8 @@ def calculate_metrics(y_true, y_pred):
     Returns:
         dict: Metrik değerlerini içeren sözlük
     """
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
     metrics = {
         'accuracy': accuracy_score(y_true, y_pred),
         'precision': precision_score(y_true, y_pred, zero_division=0),
@@ -116,8 +165,8 @@ if __name__ == "__main__":
     query = "çanakkalede orman yangını"
     query_tokens = preprocess_text(query)
 
-    conn = psycopg2.connect(**DB_CONFIG)
-    results = compute_bm25(query_tokens, conn)
+    with connection() as conn:
+        results = compute_bm25(query_tokens, conn)
     doc_ids = [doc_id for doc_id, _ in results]
 
     print("doc_ids length: ", len(doc_ids))
@@ -0,0 +1,195 @@
+import numpy as np
+from posting_index import decode_varints, bm25_idf, IMPACT_LEVELS
+
+# Index'ten CSR'a çevirirken bir seferde açılan en fazla bayt
+DECODE_CHUNK_BYTES = 64 * 1024 * 1024
+
+# score_batch'in bir seferde skorladığı en fazla posting; ara diziler
+# CPU önbelleğinde kalacak kadar küçük tutulur
+BATCH_POSTINGS = 256 * 1024
+
+# Posting sayısı N / SPARSE_RATIO'dan azsa skorlar yoğun dizi yerine
+# sıralanarak toplanır
+SPARSE_RATIO = 8
+
+class CsrBm25:
+    """
+    Bellekte CSR düzeninde tutulan posting'ler üzerinde vektörel BM25.
+
+    i. terimin posting'leri doc_nums[indptr[i]:indptr[i + 1]] ve aynı
+    aralıktaki freqs'tir; doc_nums iç doküman numaralarıdır (doc_ids'e
+    indeks). Bir terimin bütün posting'leri tek bir NumPy ifadesiyle
+    skorlanır, dokümanlara np.bincount ile toplanır, top-k argpartition ile
+    seçilir. Python döngüsü sadece sorgu terimleri üzerindedir.
+
+    impacts verilirse (posting başına önceden hesaplanmış BM25 katkısı)
+    sorguda formül hesaplanmaz, katkılar doğrudan toplanır.
+    """
+    def __init__(self, terms, indptr, doc_nums, freqs, doc_ids, doc_lengths, k1=1.5, b=0.75,
+                 impacts=None):
+        self.term_rows = {term: row for row, term in enumerate(terms)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.doc_nums = np.asarray(doc_nums, dtype=np.int64)
+        self.freqs = np.asarray(freqs, dtype=np.float64)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float64)
+        self.k1 = k1
+        self.b = b
+        self.impacts = impacts
+
+        self.N = len(self.doc_ids)
+        self.avgdl = float(self.doc_lengths.mean()) if self.N else 0.0
+        self.idf = bm25_idf(self.N, np.diff(self.indptr).astype(np.float64))
+        # BM25 paydasının dokümana bağlı kısmı sorgudan bağımsızdır
+        self.length_norms = k1 * (1 - b + b * self.doc_lengths / self.avgdl) if self.N else self.doc_lengths
+
+    @classmethod
+    def from_posting_index(cls, index, k1=1.5, b=0.75, use_impacts=True):
+        """
+        posting_index.PostingIndex'in bütün posting'lerini açar. Index
+        impact'lerle kurulduysa ve k1/b aynıysa impact'ler de yüklenir.
+        """
+        term_count = len(index)
+        terms = [index._term_at(i).decode("utf-8") for i in range(term_count)]
+        indptr = np.zeros(term_count + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(index.dfs)
+        doc_nums = np.empty(int(indptr[-1]), dtype=np.int64)
+        freqs = np.empty(int(indptr[-1]), dtype=np.float64)
+
+        term_bytes = index.block_offsets[index.term_blocks]
+        start = 0
+        while start < term_count:
+            # DECODE_CHUNK_BYTES'a sığan terimler bir seferde açılır
+            end = int(np.searchsorted(term_bytes, term_bytes[start] + DECODE_CHUNK_BYTES, side="right")) - 1
+            end = min(max(end, start + 1), term_count)
+            values = decode_varints(index.postings_data[term_bytes[start]:term_bytes[end]])
+            gaps = values[0::2].astype(np.int64)
+            lo, hi = indptr[start], indptr[end]
+            # Gap'ler her terimin başında sıfırdan başlar
+            term_starts = indptr[start:end] - lo
+            cumulative = np.cumsum(gaps)
+            doc_nums[lo:hi] = cumulative - np.repeat(cumulative[term_starts] - gaps[term_starts],
+                                                     np.diff(indptr[start:end + 1]))
+            freqs[lo:hi] = values[1::2]
+            start = end
+
+        impacts = None
+        if use_impacts and index.impacts is not None and (k1, b) == (index.k1, index.b):
+            # PostingIndex.term_impacts ile aynı float64 hesap; skorlar
+            # compute_bm25_index'inkilerle aynı olur
+            scales = np.asarray(index.max_scores, dtype=np.float64) / IMPACT_LEVELS
+            impacts = index.impacts * np.repeat(scales, np.asarray(index.dfs, dtype=np.int64))
+
+        return cls(terms, indptr, doc_nums, freqs, index.doc_ids, index.doc_lengths, k1, b, impacts)
+
+    @classmethod
+    def from_database(cls, conn, k1=1.5, b=0.75, itersize=100_000):
+        """
+        doc_lengths ve inverted_index tablolarından yükler
+        """
+        with conn.cursor() as cur:
+            cur.execute("SELECT doc_id, length FROM doc_lengths ORDER BY doc_id")
+            rows = cur.fetchall()
+        doc_ids = np.array([doc_id for doc_id, _ in rows], dtype=np.int64)
+        doc_lengths = np.array([length for _, length in rows], dtype=np.float64)
+
+        terms = []
+        counts = []
+        posting_doc_ids = []
+        freqs = []
+        with conn.cursor(name="csr_bm25_export") as cur:
+            cur.itersize = itersize
+            cur.execute("SELECT term, doc_id, freq FROM inverted_index ORDER BY term, doc_id")
+            for term, doc_id, freq in cur:
+                if not terms or terms[-1] != term:
+                    terms.append(term)
+                    counts.append(0)
+                counts[-1] += 1
+                posting_doc_ids.append(doc_id)
+                freqs.append(freq)
+        conn.commit()
+
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(counts)
+        doc_nums = np.searchsorted(doc_ids, np.asarray(posting_doc_ids, dtype=np.int64))
+        return cls(terms, indptr, doc_nums, freqs, doc_ids, doc_lengths, k1, b)
+
+    def _postings(self, rows):
+        """
+        Verilen terim satırlarının bütün posting'leri ve BM25 katkıları,
+        satır sırasıyla art arda
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(int(lengths.sum())) + np.repeat(starts - offsets, lengths)
+
+        doc_nums = self.doc_nums[positions]
+        if self.impacts is not None:
+            return doc_nums, self.impacts[positions], lengths
+        freqs = self.freqs[positions]
+        idf = np.repeat(self.idf[rows], lengths)
+        contributions = idf * (freqs * (self.k1 + 1)) / (freqs + self.length_norms[doc_nums])
+        return doc_nums, contributions, lengths
+
+    def _rows(self, query_tokens):
+        return [self.term_rows[term] for term in query_tokens if term in self.term_rows]
+
+    def _ranked(self, doc_nums, scores, k):
+        if k is not None and len(doc_nums) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            doc_nums, scores = doc_nums[keep], scores[keep]
+        order = np.lexsort((doc_nums, -scores))
+        return list(zip(self.doc_ids[doc_nums[order]].tolist(), scores[order].tolist()))
+
+    def _score_postings(self, doc_nums, contributions, k):
+        if len(doc_nums) == 0:
+            return []
+        if len(doc_nums) * SPARSE_RATIO < self.N:
+            # Az posting: N uzunluğunda dizi yerine sıralayıp toplamak ucuz
+            matched, inverse = np.unique(doc_nums, return_inverse=True)
+            return self._ranked(matched, np.bincount(inverse.ravel(), weights=contributions), k)
+        totals = np.bincount(doc_nums, weights=contributions, minlength=self.N)
+        matched = np.flatnonzero(totals)
+        return self._ranked(matched, totals[matched], k)
+
+    def score(self, query_tokens, k=None):
+        """
+        compute_bm25 ile aynı sonuç: skora göre azalan (doc_id, score);
+        k verilirse sadece ilk k
+        """
+        doc_nums, contributions, _ = self._postings(self._rows(query_tokens))
+        return self._score_postings(doc_nums, contributions, k)
+
+    def score_batch(self, queries, k=None):
+        """
+        Birden çok token listesini tek çağrıda skorlar. Sorgular toplam
+        BATCH_POSTINGS posting'lik gruplara ayrılır; bir grubun bütün
+        posting'leri tek seferde toplanıp tek vektörel ifadeyle skorlanır,
+        sorgu başına sadece toplama ve top-k seçimi kalır.
+
+        Returns:
+            list: Her sorgu için score() ile aynı liste
+        """
+        query_rows = [self._rows(query_tokens) for query_tokens in queries]
+        query_sizes = [int((self.indptr[np.asarray(rows, dtype=np.int64) + 1]
+                            - self.indptr[np.asarray(rows, dtype=np.int64)]).sum())
+                       for rows in query_rows]
+
+        results = []
+        first = 0
+        while first < len(queries):
+            last = first + 1
+            total = query_sizes[first]
+            while last < len(queries) and total + query_sizes[last] <= BATCH_POSTINGS:
+                total += query_sizes[last]
+                last += 1
+
+            group = query_rows[first:last]
+            doc_nums, contributions, _ = self._postings([row for rows in group for row in rows])
+            bounds = np.cumsum([0] + query_sizes[first:last])
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                results.append(self._score_postings(doc_nums[lo:hi], contributions[lo:hi], k))
+            first = last
+        return results
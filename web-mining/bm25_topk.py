@@ -0,0 +1,146 @@
+import math
+from collections import Counter
+import numpy as np
+from posting_index import IMPACT_LEVELS, bm25_term_scores
+
+# Build ve sorgu sırasında aynı formül farklı sırayla toplanabilir; üst
+# sınırlar bu kadar genişletilir ki yuvarlama bir dokümanı yanlışlıkla elemesin
+BOUND_SLACK = 1 + 1e-9
+
+def _kth_largest(values, k):
+    if len(values) < k:
+        return 0.0
+    return float(np.partition(values, len(values) - k)[len(values) - k])
+
+def search_top_k(index, query_tokens, k, k1=None, b=None, use_impacts=True):
+    """
+    Memory-mapped index üzerinde MaxScore + block-max ile BM25 top-k.
+
+    Terimler üst sınırlarına (max_score) göre büyükten küçüğe işlenir.
+    Başta her terimin bütün posting'leri skorlanır (essential terimler).
+    k. en iyi kısmi skor (eşik), kalan terimlerin üst sınırları toplamını
+    geçince henüz görülmemiş bir doküman artık top-k'ya giremez: kalan
+    terimler için sadece aday dokümanlara bakılır, sadece adayları içeren
+    ve block_max'ı yetebilecek bloklar açılır, eşiğe ulaşamayacak adaylar
+    elenir. Sonuç, eşit skorlar dışında compute_bm25_index'in ilk k
+    sonucuyla aynıdır.
+
+    Index impact'lerle kurulduysa compute_bm25_index gibi nicemlenmiş
+    katkılar toplanır; her iki yol aynı skorları verir. Nicemleme bir
+    katkıyı en fazla bir seviye (max_score / 255) büyütebildiğinden blok
+    sınırları bu kadar genişletilir, max_score ise zaten üst sınırdır.
+
+    Index'in üst sınırları kurulumdaki k1/b ile hesaplandığından başka
+    parametrelerle tam (exhaustive) skorlama yapılır.
+
+    Returns:
+        list: En fazla k adet (doc_id, score), skora göre azalan
+    """
+    from bm25_implementation import compute_bm25_index
+
+    k1 = index.k1 if k1 is None else k1
+    b = index.b if b is None else b
+    if k1 != index.k1 or b != index.b:
+        return compute_bm25_index(query_tokens, index, k1, b, use_impacts)[:k]
+    if k <= 0:
+        return []
+    impacts = use_impacts and index.impacts is not None
+
+    # Tekrarlanan sorgu terimleri compute_bm25'teki gibi tekrar sayılır
+    terms = []
+    for term, weight in Counter(query_tokens).items():
+        i = index.lookup(term)
+        if i is not None:
+            terms.append((weight * float(index.max_scores[i]) * BOUND_SLACK, i, weight))
+    if not terms:
+        return []
+    terms.sort(reverse=True)
+
+    N, avgdl = index.N, index.avgdl
+    scores = np.zeros(N)
+    # Essential aşamada skorlanan dokümanlar, gerektiğinde birleştirilir
+    touched_parts = []
+    candidates = None
+    threshold = 0.0
+    remaining = sum(bound for bound, _, _ in terms)
+    processed = 0.0
+
+    for bound, i, weight in terms:
+        df = int(index.dfs[i])
+        idf = weight * math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+        if candidates is None:
+            # Kısmi skorlar en fazla işlenmiş terimlerin sınırları toplamı
+            # olabilir; eşik ancak bu durumda kalan sınırı geçebilir
+            if 0 < remaining < processed:
+                touched_parts = [np.unique(np.concatenate(touched_parts))]
+                threshold = _kth_largest(scores[touched_parts[0]], k)
+                if remaining < threshold:
+                    candidates = touched_parts[0]
+
+        if candidates is None:
+            doc_nums, freqs = index.term_postings(i)
+            if impacts:
+                scores[doc_nums] += weight * index.term_impacts(i)
+            else:
+                scores[doc_nums] += bm25_term_scores(freqs, index.doc_lengths[doc_nums], idf, avgdl, k1, b)
+            touched_parts.append(doc_nums)
+            remaining -= bound
+            processed += bound
+            continue
+
+        remaining -= bound
+        first, last = index.term_blocks[i], index.term_blocks[i + 1]
+        last_docs = index.block_last_doc[first:last]
+        # Adayın bu terimi içerebileceği blok bulunur; o bloğun üst sınırıyla
+        # bile eşiğe ulaşamayan adaylar elenir, kalanların blokları açılır
+        blocks = np.searchsorted(last_docs, candidates)
+        in_range = blocks < len(last_docs)
+        block_bounds = np.zeros(len(candidates))
+        block_max = index.block_max[first + blocks[in_range]]
+        if impacts:
+            block_max = block_max + float(index.max_scores[i]) / IMPACT_LEVELS
+        block_bounds[in_range] = weight * block_max * BOUND_SLACK
+        alive = scores[candidates] + remaining + block_bounds >= threshold
+        candidates = candidates[alive]
+        blocks = blocks[alive]
+        in_range = in_range[alive]
+        if len(candidates) == 0:
+            break
+
+        needed = np.unique(blocks[in_range])
+        if len(needed):
+            doc_nums, freqs = index.block_postings(i, needed)
+            targets = candidates[in_range]
+            pos = np.minimum(np.searchsorted(doc_nums, targets), len(doc_nums) - 1)
+            hit = doc_nums[pos] == targets
+            pos = pos[hit]
+            hits = targets[hit]
+            if impacts:
+                scores[hits] += weight * index.block_impacts(i, needed)[pos]
+            else:
+                scores[hits] += bm25_term_scores(freqs[pos], index.doc_lengths[hits], idf, avgdl, k1, b)
+            threshold = max(threshold, _kth_largest(scores[candidates], k))
+
+    if candidates is None:
+        pool = np.unique(np.concatenate(touched_parts))
+    else:
+        pool = candidates
+    pool = pool[scores[pool] > 0]
+    if len(pool) > k:
+        pool = pool[np.argpartition(-scores[pool], k - 1)[:k]]
+    pool = pool[np.lexsort((pool, -scores[pool]))]
+    return list(zip(index.doc_ids[pool].tolist(), scores[pool].tolist()))
+
+def estimate_matches(index, query_tokens):
+    """
+    Sorguyla eşleşen doküman sayısı; top-k sorgularda sayfalama için.
+    Tek terimli sorgularda df kesindir. Çok terimlilerde en yüksek df bir
+    alt sınırdır: kesin sayı bütün posting listelerinin açılmasını
+    gerektirir ve top-k budamasını boşa çıkarır.
+
+    Returns:
+        (count, exact)
+    """
+    dfs = [df for df in (index.df(term) for term in set(query_tokens)) if df]
+    return max(dfs, default=0), len(dfs) <= 1
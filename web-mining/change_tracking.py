@@ -0,0 +1,104 @@
+def ensure_tracking_schema(conn):
+    """
+    Artımlı (incremental) preprocessing ve indeksleme için gereken kolon,
+    index ve tabloları oluşturur.
+
+    - pages_cleaned.updated_at: satırın en son temizlendiği zaman
+    - doc_lengths.indexed_at: dokümanın en son indekslendiği zaman
+    - inverted_index(doc_id) index'i: bir dokümanın eski posting'lerini
+      silmek için
+    - corpus_stats: BM25'in ihtiyaç duyduğu N ve toplam uzunluk, her
+      indeks güncellemesinde artan generation ile birlikte
+    - term_stats: terim başına doküman frekansı (df)
+
+    Kolonlar aynı transaction'da eklenir; böylece mevcut satırlar için
+    updated_at == indexed_at olur ve ilk artımlı çalıştırmada hepsi
+    güncel sayılır.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            ALTER TABLE pages_cleaned
+            ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP;
+        """)
+        cur.execute("""
+            ALTER TABLE doc_lengths
+            ADD COLUMN IF NOT EXISTS indexed_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP;
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS inverted_index_doc_id_idx ON inverted_index (doc_id);")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS corpus_stats (
+                id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                doc_count bigint NOT NULL,
+                total_length bigint NOT NULL,
+                generation bigint NOT NULL DEFAULT 0,
+                updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        # Bu özellikten önce kurulmuş bir indeks için başlangıç değerleri
+        cur.execute("""
+            INSERT INTO corpus_stats (id, doc_count, total_length)
+            SELECT 1, COUNT(*), COALESCE(SUM(length), 0) FROM doc_lengths
+            ON CONFLICT (id) DO NOTHING;
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS term_stats (
+                term text PRIMARY KEY,
+                df integer NOT NULL
+            );
+        """)
+        cur.execute("""
+            INSERT INTO term_stats (term, df)
+            SELECT term, COUNT(*) FROM inverted_index
+            WHERE NOT EXISTS (SELECT 1 FROM term_stats)
+            GROUP BY term;
+        """)
+    conn.commit()
+
+def reset_corpus_stats(cur, doc_count, total_length):
+    """
+    Tam indeks kurulumundan sonra istatistikleri baştan yazar
+    """
+    cur.execute("""
+        INSERT INTO corpus_stats (id, doc_count, total_length, generation)
+        VALUES (1, %s, %s, 1)
+        ON CONFLICT (id) DO UPDATE
+        SET doc_count = EXCLUDED.doc_count,
+            total_length = EXCLUDED.total_length,
+            generation = corpus_stats.generation + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    """, (doc_count, total_length))
+
+def apply_corpus_delta(cur, doc_delta, length_delta):
+    """
+    Artımlı bir indeks güncellemesinin N ve toplam uzunluk farkını uygular.
+    Commit çağıran tarafta, posting'lerle aynı transaction'da yapılır.
+    """
+    cur.execute("""
+        UPDATE corpus_stats
+        SET doc_count = doc_count + %s,
+            total_length = total_length + %s,
+            generation = generation + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    """, (doc_delta, length_delta))
+
+def rebuild_term_stats(cur):
+    """
+    Tam indeks kurulumundan sonra df'leri inverted_index'ten baştan hesaplar
+    """
+    cur.execute("TRUNCATE TABLE term_stats")
+    cur.execute("""
+        INSERT INTO term_stats (term, df)
+        SELECT term, COUNT(*) FROM inverted_index GROUP BY term;
+    """)
+
+def get_corpus_stats(cur):
+    """
+    (N, avgdl, generation) ya da istatistik yoksa None
+    """
+    cur.execute("SELECT doc_count, total_length, generation FROM corpus_stats WHERE id = 1;")
+    row = cur.fetchone()
+    if row is None or not row[0]:
+        return None
+    doc_count, total_length, generation = row
+    return doc_count, total_length / doc_count, generation
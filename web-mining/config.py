@@ -10,4 +10,12 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD'),
     'host': os.getenv('DB_HOST', 'localhost'),
     'port': os.getenv('DB_PORT', '5432')
-} 
\ No newline at end of file
+} 
+
+# Connection pool (db_pool.py)
+DB_POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN', '1')),
+    'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'health_check_idle': float(os.getenv('DB_POOL_HEALTH_CHECK_IDLE', '30')),
+}
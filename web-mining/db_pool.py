@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+from psycopg2 import extensions
+
+from config import DB_CONFIG, DB_POOL_CONFIG
+
+class PoolTimeout(Exception):
+    """
+    timeout süresi içinde boş bağlantı bulunamadı
+    """
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 bağlantı havuzu.
+
+    - min_size bağlantı açık tutulur, en fazla max_size bağlantı açılır
+    - Havuz doluysa checkout en fazla timeout saniye bekler, sonra
+      PoolTimeout fırlatır
+    - health_check_idle saniyeden uzun boşta kalmış bir bağlantı verilmeden
+      önce SELECT 1 ile denenir; kopmuş bağlantılar atılıp yenisi açılır
+    - connection() context manager'ı bağlantıyı her durumda geri verir;
+      açık kalmış transaction'lar geri alınır
+    """
+    def __init__(self, min_size=1, max_size=10, timeout=10.0, health_check_idle=30.0, **connect_kwargs):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("pool requires 1 <= max_size and min_size <= max_size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self.connect_kwargs = connect_kwargs or DB_CONFIG
+
+        self.lock = threading.Condition()
+        self.idle = deque()  # (connection, geri verildiği zaman)
+        self.size = 0
+        self.closed = False
+        self.stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "discarded": 0,
+        }
+
+        for _ in range(min_size):
+            self.idle.append((self._connect(), time.monotonic()))
+            self.size += 1
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        self.stats["connects"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self.lock:
+            self.size -= 1
+            self.stats["discarded"] += 1
+            self.lock.notify()
+
+    def getconn(self, timeout=None):
+        """
+        Havuzdan bir bağlantı alır. Mümkünse connection() kullanılmalı.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = None
+        while True:
+            with self.lock:
+                if self.closed:
+                    raise PoolTimeout("connection pool is closed")
+                while not self.idle and self.size >= self.max_size:
+                    if waited is None:
+                        waited = time.monotonic()
+                        self.stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        self.stats["wait_time"] += time.monotonic() - waited
+                        raise PoolTimeout(f"no free connection after {timeout:.1f}s "
+                                          f"({self.size}/{self.max_size} in use)")
+                    self.lock.wait(remaining)
+                if waited is not None:
+                    self.stats["wait_time"] += time.monotonic() - waited
+                    waited = None
+                self.stats["checkouts"] += 1
+                if self.idle:
+                    conn, idle_since = self.idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self.size += 1
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self.lock:
+                        self.size -= 1
+                        self.lock.notify()
+                    raise
+            if self._is_healthy(conn, idle_since):
+                return conn
+            # Kopmuş bağlantı: at, döngü yenisini açar
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """
+        Bağlantıyı havuza geri verir. Açık transaction geri alınır, bozuk
+        bağlantı ya da min_size üstündeki fazlalık kapatılır.
+        """
+        status = conn.info.transaction_status if not conn.closed else extensions.TRANSACTION_STATUS_UNKNOWN
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            self._discard(conn)
+            return
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        with self.lock:
+            if self.closed:
+                conn.close()
+                self.size -= 1
+                return
+            self.idle.append((conn, time.monotonic()))
+            self.lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def metrics(self):
+        """
+        Havuz durumu: açık, kullanımda ve boştaki bağlantılar, bekleme
+        sayısı ve toplam bekleme süresi
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+            metrics.update({
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": self.size - len(self.idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        metrics["avg_wait_ms"] = 1000 * metrics["wait_time"] / metrics["waits"] if metrics["waits"] else 0.0
+        return metrics
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            while self.idle:
+                conn, _ = self.idle.pop()
+                conn.close()
+                self.size -= 1
+            self.lock.notify_all()
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# Fork ile ebeveynden gelen havuzlar. Çöp toplayıcı bunları silerse
+# psycopg2 bağlantıları kapatır ve ebeveynle paylaşılan soketlere
+# Terminate gönderir; ebeveynin oturumları kopar. Bu yüzden child'da
+# referansları tutulur ve hiç kullanılmaz (multiprocessing worker'ları
+# os._exit ile çıktığı için çıkışta da kapatılmazlar).
+_inherited_pools = []
+
+def get_pool():
+    """
+    Process başına tek havuz (DB_POOL_CONFIG). Fork edilmiş worker'lar
+    ebeveynin bağlantılarını kullanmaz ve kapatmaz, kendi havuzlarını açar.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+            _pool = ConnectionPool(**DB_POOL_CONFIG)
+            _pool_pid = os.getpid()
+        return _pool
+
+def connection(timeout=None):
+    """
+    get_pool().connection() kısayolu:
+
+        with connection() as conn:
+            ...
+    """
+    return get_pool().connection(timeout)
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from psycopg2 import errors
+
+# Önbellekteki doküman sayısı üst sınırı (LRU)
+DOC_METADATA_CACHE_SIZE = 100_000
+
+# Önbellekteki bir kayıt bu kadar saniye sonra veritabanından tekrar okunur;
+# title/url güncellemeleri çalışan process'lere en geç bu sürede yansır
+DOC_METADATA_TTL = float(os.getenv("DOC_METADATA_TTL", "300"))
+
+# doc_metadata tablosu yoksa pages'e bu kadar saniye düşülür, sonra tablo
+# tekrar denenir
+FALLBACK_RETRY_INTERVAL = 60.0
+
+def ensure_metadata_schema(conn):
+    """
+    Arama sonuçlarında gösterilen url/title için dar doc_metadata tablosu.
+
+    pages ham html'i de taşıdığından geniş bir tablodur; sonuç sayfası için
+    gereken iki kolon ayrı tutulur. pages'e yazılan, güncellenen ya da
+    silinen satırlar trigger ile doc_metadata'ya yansıtılır; tablo ilk kez
+    oluşturulduğunda mevcut sayfalarla doldurulur.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS doc_metadata (
+                id integer PRIMARY KEY,
+                url text,
+                title text
+            );
+        """)
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION sync_doc_metadata() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM doc_metadata WHERE id = OLD.id;
+                    RETURN OLD;
+                END IF;
+                INSERT INTO doc_metadata (id, url, title)
+                VALUES (NEW.id, NEW.url, NEW.title)
+                ON CONFLICT (id) DO UPDATE
+                SET url = EXCLUDED.url, title = EXCLUDED.title;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS pages_doc_metadata ON pages;")
+        cur.execute("""
+            CREATE TRIGGER pages_doc_metadata
+            AFTER INSERT OR UPDATE OF url, title OR DELETE ON pages
+            FOR EACH ROW EXECUTE FUNCTION sync_doc_metadata();
+        """)
+        cur.execute("""
+            INSERT INTO doc_metadata (id, url, title)
+            SELECT id, url, title FROM pages
+            WHERE NOT EXISTS (SELECT 1 FROM doc_metadata);
+        """)
+    conn.commit()
+
+def rebuild_doc_metadata(conn):
+    """
+    doc_metadata'yı pages'ten baştan yazar
+    """
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE TABLE doc_metadata")
+        cur.execute("INSERT INTO doc_metadata (id, url, title) SELECT id, url, title FROM pages;")
+    conn.commit()
+
+class DocMetadataStore:
+    """
+    doc_id → {"url", "title"} için process içi LRU önbellek.
+
+    Eksik ya da ttl'den eski id'ler doc_metadata'dan tek sorguyla okunur.
+    Tablo henüz oluşturulmamışsa (ensure_metadata_schema çalışmamış)
+    FALLBACK_RETRY_INTERVAL boyunca pages'e düşülür.
+    """
+    def __init__(self, max_entries=DOC_METADATA_CACHE_SIZE, ttl=DOC_METADATA_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # doc_id → (kayıt, okunma zamanı)
+        self.entries = OrderedDict()
+        self.fallback_until = 0.0
+
+    @property
+    def table(self):
+        return "pages" if time.monotonic() < self.fallback_until else "doc_metadata"
+
+    def cached(self, doc_ids):
+        """
+        (önbellekte bulunanlar, eksik id'ler)
+        """
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for doc_id in doc_ids:
+                cached = self.entries.get(doc_id)
+                if cached is None or now - cached[1] > self.ttl:
+                    missing.append(doc_id)
+                else:
+                    self.entries.move_to_end(doc_id)
+                    found[doc_id] = cached[0]
+        return found, missing
+
+    def fetch(self, cursor, doc_ids):
+        """
+        Verilen id'leri veritabanından okuyup önbelleğe ekler
+        """
+        if not doc_ids:
+            return {}
+        now = time.monotonic()
+        try:
+            cursor.execute(f"SELECT id, url, title FROM {self.table} WHERE id = ANY(%s);", (list(doc_ids),))
+        except errors.UndefinedTable:
+            cursor.connection.rollback()
+            self.fallback_until = now + FALLBACK_RETRY_INTERVAL
+            cursor.execute("SELECT id, url, title FROM pages WHERE id = ANY(%s);", (list(doc_ids),))
+        fetched = {row[0]: {"url": row[1], "title": row[2]} for row in cursor.fetchall()}
+
+        with self.lock:
+            for doc_id in doc_ids:
+                # Silinmiş sayfalar önbellekte kalmasın
+                if doc_id not in fetched:
+                    self.entries.pop(doc_id, None)
+            for doc_id, entry in fetched.items():
+                self.entries[doc_id] = (entry, now)
+                self.entries.move_to_end(doc_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return fetched
+
+    def lookup(self, cursor, doc_ids):
+        found, missing = self.cached(doc_ids)
+        found.update(self.fetch(cursor, missing))
+        return found
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+_doc_metadata = DocMetadataStore()
+
+def get_doc_metadata():
+    return _doc_metadata
+
+if __name__ == "__main__":
+    import argparse
+    from db_pool import connection
+
+    parser = argparse.ArgumentParser(description="pages → doc_metadata")
+    parser.add_argument("--rebuild", action="store_true", help="Tabloyu pages'ten baştan yaz")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        ensure_metadata_schema(conn)
+        if args.rebuild:
+            rebuild_doc_metadata(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM doc_metadata")
+            print(f"doc_metadata: {cur.fetchone()[0]} rows")
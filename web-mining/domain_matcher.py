@@ -0,0 +1,55 @@
+from urllib.parse import urlsplit
+
+class DomainMatcher:
+    """
+    Host based URL filter built once from the domain list.
+
+    A URL matches when its host is one of the domains or a subdomain of one
+    (www.aa.com.tr and spor.aa.com.tr match aa.com.tr, haberaa.com.tr and
+    example.com/aa.com.tr do not). Lookup walks the host's dot suffixes
+    against a set, so the cost depends on the URL, not on the list size.
+    """
+    def __init__(self, domains):
+        self.domains = set()
+        for domain in domains:
+            domain = domain.strip().lower().rstrip('.')
+            if not domain:
+                continue
+            if domain.startswith('www.'):
+                domain = domain[4:]
+            self.domains.add(domain)
+            # Turkish domains show up punycoded in WARC-Target-URI
+            try:
+                self.domains.add(domain.encode('idna').decode('ascii'))
+            except UnicodeError:
+                pass
+
+    def __len__(self):
+        return len(self.domains)
+
+    def match_host(self, host):
+        host = host.lower().rstrip('.')
+        domains = self.domains
+        while True:
+            if host in domains:
+                return True
+            dot = host.find('.')
+            if dot < 0:
+                return False
+            host = host[dot + 1:]
+
+    @staticmethod
+    def get_host(url):
+        try:
+            host = urlsplit(url).hostname
+        except ValueError:
+            return None
+        return host
+
+    def match(self, url):
+        if not url:
+            return False
+        host = self.get_host(url)
+        return bool(host) and self.match_host(host)
+
+    __call__ = match
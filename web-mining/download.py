@@ -1,14 +1,27 @@
 import os
+import argparse
+import shutil
+import threading
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
 import requests
 from tqdm import tqdm
-import gzip
 from warcio.archiveiterator import ArchiveIterator
-import psycopg2
 from psycopg2.extras import execute_values
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
-from config import DB_CONFIG
+from db_pool import get_pool
+from doc_metadata import ensure_metadata_schema
+from domain_matcher import DomainMatcher
+from html_extraction import extract_title
+from ingest_manifest import IngestManifest
+from warc_chunks import scan_member_offsets, split_into_chunks, chunk_key, RangeReader
+from warc_index import (get_index_path, load_index, load_or_build_index, select_entries,
+                        read_record, LocalRecordReader, HttpRecordReader, INDEX_DIR)
+
+# Base URL for the WARC files
+BASE_URL = "https://data.commoncrawl.org/"
 
 def download_file(url, filename):
     """
@@ -35,44 +48,517 @@ def get_target_urls():
     with open("basin-ilan-kurumu-websites.txt", "r") as f:
         return [line.strip() for line in f.readlines()]
 
-def process_warc_file(warc_file, target_urls, conn):
+class PageWriter:
     """
-    Process a WARC file and save matching pages to PostgreSQL
+    Buffers (url, title, html) rows and writes them to `pages` with
+    execute_values, one transaction per batch. A batch is flushed once it
+    holds `batch_rows` rows or `batch_bytes` bytes of HTML. If the batch
+    insert fails, its rows are retried one by one behind savepoints so a
+    single bad row does not drop the rest.
+
+    `checkpoint(cur, pages, position)` is called inside every batch
+    transaction, before the commit, with the `position` of the batch's
+    last row.
     """
-    print(f"\nProcessing {warc_file}...")
+    def __init__(self, conn, batch_rows=500, batch_bytes=32 * 1024 ** 2, checkpoint=None):
+        self.conn = conn
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.checkpoint = checkpoint
+        self.rows = []
+        self.buffered_bytes = 0
+        self.position = None
+        self.written = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def add(self, url, title, html, position=None):
+        self.rows.append((url, title, html))
+        self.buffered_bytes += len(html)
+        self.position = position
+        if len(self.rows) >= self.batch_rows or self.buffered_bytes >= self.batch_bytes:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows. Returns the number of rows written.
+        """
+        rows = self.rows
+        if not rows:
+            return 0
+        self.rows = []
+        self.buffered_bytes = 0
+
+        try:
+            with self.conn.cursor() as cur:
+                execute_values(cur, "INSERT INTO pages (url, title, html) VALUES %s", rows)
+                if self.checkpoint:
+                    self.checkpoint(cur, len(rows), self.position)
+            self.conn.commit()
+            written = len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Batch insert failed ({str(e)}), retrying {len(rows)} rows one by one")
+            written = self._write_rows_individually(rows)
+
+        self.written += written
+        print(f"Saved {written} pages")
+        return written
+
+    def _write_rows_individually(self, rows):
+        written = 0
+        with self.conn.cursor() as cur:
+            for row in rows:
+                cur.execute("SAVEPOINT page_row")
+                try:
+                    cur.execute("""
+                        INSERT INTO pages (url, title, html)
+                        VALUES (%s, %s, %s)
+                    """, row)
+                    cur.execute("RELEASE SAVEPOINT page_row")
+                    written += 1
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT page_row")
+                    self.failed += 1
+                    print(f"Error saving {row[0]}: {str(e)}")
+            if self.checkpoint:
+                self.checkpoint(cur, written, self.position)
+        self.conn.commit()
+        return written
+
+def extract_page(record):
+    """
+    HTML and title of a response record
+    """
+    # Get HTML content
+    html = record.content_stream().read().decode('utf-8', errors='ignore')
     
-    with gzip.open(warc_file, 'rb') as stream:
-        for record in ArchiveIterator(stream):
+    # remove null characters
+    html = html.replace('\x00', '')
+
+    title = extract_title(html)
+    return html, title
+
+def process_warc_file(warc_file, matcher, conn, manifest=None, warc_path=None, byte_range=None):
+    """
+    Process a WARC file and save matching pages to PostgreSQL.
+    `matcher` is a DomainMatcher (a plain domain list is compiled into one).
+
+    With a `manifest`, every page batch is checkpointed under `warc_path`
+    and processing resumes after the last committed record, so a rerun
+    does not insert the same page twice. `byte_range` (start, end) limits
+    processing to the gzip members inside that range of the file.
+    Returns the number of saved pages.
+    """
+    if not isinstance(matcher, DomainMatcher):
+        matcher = DomainMatcher(matcher)
+
+    checkpoint = None
+    start_offset, end_offset = byte_range or (0, None)
+    resumed = False
+    if manifest is not None:
+        resume_offset = manifest.resume_offset(warc_path)
+        resumed = resume_offset > start_offset
+        start_offset = max(start_offset, resume_offset)
+
+        def checkpoint(cur, pages, position):
+            offset, length = position
+            manifest.checkpoint(cur, warc_path, pages, offset, length)
+
+    if resumed:
+        print(f"\nResuming {warc_file} at byte {start_offset}...")
+    else:
+        print(f"\nProcessing {warc_file}...")
+    
+    # ArchiveIterator decompresses the per-record gzip members itself and
+    # reports their offsets in the compressed file, which is what a
+    # checkpoint needs to seek back to
+    with open(warc_file, 'rb') as stream, PageWriter(conn, checkpoint=checkpoint) as writer:
+        stream.seek(start_offset)
+        if end_offset is not None:
+            stream = RangeReader(stream, end_offset)
+        records = ArchiveIterator(stream)
+        for record in records:
             if record.rec_type == 'response':
                 url = record.rec_headers.get_header('WARC-Target-URI')
                 
-                # Check if URL matches any of our target URLs
-                if any(target_url in url for target_url in target_urls):
+                # Check if URL belongs to one of our target domains
+                if matcher.match(url):
                     try:
-                        # Get HTML content
-                        html = record.content_stream().read().decode('utf-8', errors='ignore')
-                        
-                        # remove null characters
-                        html = html.replace('\x00', '')
-
-                        soup = BeautifulSoup(html, 'html.parser')
-                        title = soup.title.string if soup.title else ''
+                        html, title = extract_page(record)
                         
-                        # Save to PostgreSQL
-                        with conn.cursor() as cur:
-                            cur.execute("""
-                                INSERT INTO pages (url, title, html)
-                                VALUES (%s, %s, %s)
-                            """, (url, title, html))
-                            conn.commit()
-                            
-                        print(f"Saved page: {url}")
+                        # Buffered; written to PostgreSQL in batches
+                        position = (records.get_record_offset(), records.get_record_length())
+                        writer.add(url, title, html, position=position)
                     except Exception as e:
                         print(f"Error processing {url}: {str(e)}")
 
+    if manifest is not None:
+        manifest.mark_processed(warc_path)
+
+    return writer.written
+
+def process_warc_file_indexed(reader, index_entries, matcher, conn, manifest=None, warc_path=None):
+    """
+    Second phase of indexed extraction: seek straight to the records whose
+    host matches and decompress only those. `reader` is a LocalRecordReader
+    or an HttpRecordReader, `index_entries` comes from warc_index.
+    Checkpoints and resume work as in process_warc_file.
+    Returns the number of saved pages.
+    """
+    if not isinstance(matcher, DomainMatcher):
+        matcher = DomainMatcher(matcher)
+
+    checkpoint = None
+    start_offset = 0
+    if manifest is not None:
+        start_offset = manifest.resume_offset(warc_path)
+
+        def checkpoint(cur, pages, position):
+            offset, length = position
+            manifest.checkpoint(cur, warc_path, pages, offset, length)
+
+    selected = select_entries(index_entries, matcher, start_offset)
+    print(f"\nExtracting {len(selected)} of {len(index_entries)} records from {warc_path}...")
+
+    with PageWriter(conn, checkpoint=checkpoint) as writer:
+        for offset, length, host, url in selected:
+            try:
+                record = read_record(reader, offset, length)
+                if record is None or record.rec_type != 'response':
+                    continue
+                html, title = extract_page(record)
+                writer.add(url, title, html, position=(offset, length))
+            except Exception as e:
+                print(f"Error processing {url}: {str(e)}")
+
+    if manifest is not None:
+        manifest.mark_processed(warc_path)
+
+    return writer.written
+
+def process_warc_range(warc_file, matcher, warc_path, start, end):
+    """
+    Process pool entry point for one byte range of a WARC file. The range
+    is checkpointed under its own manifest key.
+    """
+    conn = get_pool().getconn()
+    try:
+        manifest = IngestManifest(conn)
+        key = chunk_key(warc_path, start)
+        pages = process_warc_file(warc_file, matcher, conn, manifest=manifest,
+                                  warc_path=key, byte_range=(start, end))
+        return pages
+    finally:
+        get_pool().putconn(conn)
+
+def process_warc_file_parallel(warc_file, matcher, manifest, warc_path,
+                               workers=None, chunk_bytes=64 * 1024 ** 2):
+    """
+    Process one WARC file on several cores. The gzip member boundaries are
+    scanned once, the file is cut into ~`chunk_bytes` ranges on those
+    boundaries and a process pool decompresses, filters and parses the
+    ranges independently. The file is marked processed only when every
+    range has finished.
+
+    Progress made by process_warc_file under the file's own key is kept;
+    only members after its last checkpoint are split. The reverse is not
+    handled, so a file started in this mode should be finished in it.
+    Returns the number of pages saved by this run.
+    """
+    resume_offset = manifest.resume_offset(warc_path)
+    offsets = [offset for offset in scan_member_offsets(warc_file) if offset >= resume_offset]
+    chunks = split_into_chunks(offsets, os.path.getsize(warc_file), chunk_bytes)
+
+    entries = manifest.load()
+    todo = [
+        (start, end) for start, end in chunks
+        if entries.get(chunk_key(warc_path, start), {}).get("state") != 'processed'
+    ]
+    print(f"\n{warc_file}: {len(offsets)} records, {len(chunks)} ranges, "
+          f"{len(chunks) - len(todo)} already processed")
+
+    saved = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(process_warc_range, warc_file, matcher, warc_path, start, end)
+            for start, end in todo
+        ]
+        for future in futures:
+            try:
+                saved += future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error processing a range of {warc_file}: {str(e)}")
+
+    if failed:
+        raise RuntimeError(f"{failed} of {len(todo)} ranges failed")
+
+    entry = manifest.get(warc_path)
+    page_count = (entry["page_count"] if entry else 0) + manifest.chunk_page_count(warc_path)
+    manifest.mark_processed(warc_path, page_count=page_count)
+    return saved
+
+class DiskBudget:
+    """
+    Byte budget shared by the downloader threads. A file larger than the
+    whole budget is still admitted once nothing else is staged.
+    """
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.used_bytes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes):
+        with self._cond:
+            while self.used_bytes > 0 and self.used_bytes + nbytes > self.limit_bytes:
+                self._cond.wait()
+            self.used_bytes += nbytes
+
+    def release(self, nbytes):
+        with self._cond:
+            self.used_bytes -= nbytes
+            self._cond.notify_all()
+
+class StageStats:
+    """
+    Thread-safe counters for one pipeline stage (download or process)
+    """
+    def __init__(self, name):
+        self.name = name
+        self.files = 0
+        self.errors = 0
+        self.bytes = 0
+        self.pages = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes, seconds, pages=0, error=False):
+        with self._lock:
+            if error:
+                self.errors += 1
+            else:
+                self.files += 1
+                self.bytes += nbytes
+                self.pages += pages
+            self.busy_seconds += seconds
+
+    def report(self, wall_seconds):
+        mb = self.bytes / 1024 ** 2
+        per_worker = mb / self.busy_seconds if self.busy_seconds else 0.0
+        aggregate = mb / wall_seconds if wall_seconds else 0.0
+        print(f"{self.name:<9} files={self.files} errors={self.errors} size={mb:.1f} MB "
+              f"busy={self.busy_seconds:.1f}s throughput={aggregate:.2f} MB/s "
+              f"({per_worker:.2f} MB/s per worker) pages={self.pages}")
+
+def is_remote_source(source):
+    return source.startswith(("http://", "https://"))
+
+def get_local_warc_path(source, warc_path):
+    """
+    Resolve a warc.paths entry inside a local directory. The directory may
+    mirror the CommonCrawl layout or hold the files flat.
+    """
+    local_path = os.path.join(source, warc_path)
+    if not os.path.exists(local_path):
+        local_path = os.path.join(source, os.path.basename(warc_path))
+    return local_path
+
+def get_source_size(source, warc_path):
+    """
+    Size of a WARC file before it is staged, 0 if the server does not say
+    """
+    if is_remote_source(source):
+        response = requests.head(source + warc_path, allow_redirects=True)
+        return int(response.headers.get('content-length', 0))
+    return os.path.getsize(get_local_warc_path(source, warc_path))
+
+def fetch_warc_file(source, warc_path, filename):
+    """
+    Stage a WARC file from data.commoncrawl.org or from a local directory
+    """
+    if is_remote_source(source):
+        download_file(source + warc_path, filename)
+    else:
+        shutil.copyfile(get_local_warc_path(source, warc_path), filename)
+
+def open_record_reader(source, warc_path):
+    """
+    Random access to the records of a WARC file that is not staged locally
+    """
+    if is_remote_source(source):
+        return HttpRecordReader(source + warc_path)
+    return LocalRecordReader(get_local_warc_path(source, warc_path))
+
+def process_staged_file(filename, matcher, warc_path):
+    """
+    Process pool entry point. Connections can not cross process
+    boundaries, so every task opens its own.
+    """
+    conn = get_pool().getconn()
+    try:
+        start = time.perf_counter()
+        manifest = IngestManifest(conn)
+        pages = process_warc_file(filename, matcher, conn, manifest=manifest, warc_path=warc_path)
+        return pages, time.perf_counter() - start
+    finally:
+        get_pool().putconn(conn)
+
+def run_pipeline(warc_files, matcher, source=BASE_URL, download_dir="downloads",
+                 download_workers=2, process_workers=None, prefetch=2,
+                 disk_budget_bytes=8 * 1024 ** 3):
+    """
+    Download and process WARC files at the same time.
+
+    `download_workers` threads stage files into `download_dir` while a pool of
+    `process_workers` processes runs process_warc_file on them. At most
+    `prefetch` staged files wait for a free worker, and staged files never
+    take more than `disk_budget_bytes` on disk. Files the ingestion manifest
+    marks as processed are skipped and partial ones resume from their last
+    checkpoint. Prints a per-stage throughput report at the end.
+    """
+    process_workers = process_workers or os.cpu_count()
+    os.makedirs(download_dir, exist_ok=True)
+
+    # Only the main thread uses this connection
+    conn = get_pool().getconn()
+    try:
+        manifest = IngestManifest(conn)
+        # Keeps doc_metadata in sync with every page the workers insert
+        ensure_metadata_schema(conn)
+        entries = manifest.load()
+    except BaseException:
+        # The try/finally below only starts once the threads are running
+        get_pool().putconn(conn)
+        raise
+    todo = [w for w in warc_files if entries.get(w, {}).get("state") != 'processed']
+    print(f"Skipping {len(warc_files) - len(todo)} already processed files")
+
+    pending = queue.Queue()
+    for warc_file in todo:
+        pending.put(warc_file)
+    staged = queue.Queue(maxsize=prefetch)
+    budget = DiskBudget(disk_budget_bytes)
+    slots = threading.Semaphore(process_workers)
+    download_stats = StageStats("download")
+    process_stats = StageStats("process")
+
+    def downloader():
+        try:
+            while True:
+                try:
+                    warc_file = pending.get_nowait()
+                except queue.Empty:
+                    break
+                filename = os.path.join(download_dir, os.path.basename(warc_file))
+                if IngestManifest.is_staged(entries.get(warc_file), filename):
+                    # Left on disk by an interrupted run
+                    nbytes = os.path.getsize(filename)
+                    budget.acquire(nbytes)
+                    print(f"\nReusing staged {filename}")
+                    staged.put((warc_file, filename, nbytes, nbytes))
+                    continue
+                start = time.perf_counter()
+                reserved = 0
+                try:
+                    reserved = get_source_size(source, warc_file)
+                    budget.acquire(reserved)
+                    # Time spent waiting for the budget is not download time
+                    start = time.perf_counter()
+                    print(f"\nDownloading {warc_file}...")
+                    fetch_warc_file(source, warc_file, filename)
+                except Exception as e:
+                    print(f"Error downloading {warc_file}: {str(e)}")
+                    download_stats.add(0, time.perf_counter() - start, error=True)
+                    if os.path.exists(filename):
+                        os.remove(filename)
+                    budget.release(reserved)
+                    continue
+                nbytes = os.path.getsize(filename)
+                download_stats.add(nbytes, time.perf_counter() - start)
+                staged.put((warc_file, filename, reserved, nbytes))
+        finally:
+            # One sentinel per downloader, even if the loop fails outside
+            # the per-file try; otherwise the consumer waits forever
+            staged.put(None)
+
+    def on_processed(future, warc_file, filename, reserved, nbytes):
+        try:
+            pages, seconds = future.result()
+            process_stats.add(nbytes, seconds, pages=pages)
+            print(f"Finished {warc_file}: {pages} pages")
+        except Exception as e:
+            print(f"Error processing {warc_file}: {str(e)}")
+            process_stats.add(0, 0.0, error=True)
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)
+            budget.release(reserved)
+            slots.release()
+
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=downloader, daemon=True) for _ in range(download_workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=process_workers) as pool:
+            finished_downloaders = 0
+            while finished_downloaders < len(threads):
+                # Take a staged file only when a worker is free, so the
+                # queue (and the disk budget) is what bounds the look-ahead
+                slots.acquire()
+                item = staged.get()
+                if item is None:
+                    slots.release()
+                    finished_downloaders += 1
+                    continue
+                warc_file, filename, reserved, nbytes = item
+                manifest.mark_downloaded(warc_file, nbytes)
+                future = pool.submit(process_staged_file, filename, matcher, warc_file)
+                future.add_done_callback(
+                    lambda f, item=item: on_processed(f, *item)
+                )
+    finally:
+        get_pool().putconn(conn)
+
+    wall_seconds = time.perf_counter() - wall_start
+    print(f"\nPipeline finished in {wall_seconds:.1f}s "
+          f"({download_workers} downloaders, {process_workers} processes)")
+    download_stats.report(wall_seconds)
+    process_stats.report(wall_seconds)
+    return download_stats, process_stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download CommonCrawl WARC files and save matching pages")
+    parser.add_argument("--paths", default="warc.paths", help="File listing the WARC paths to ingest")
+    parser.add_argument("--source", default=BASE_URL,
+                        help="Base URL, or a local directory holding the WARC files")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Download and process several files concurrently")
+    parser.add_argument("--download-workers", type=int, default=2)
+    parser.add_argument("--process-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--prefetch", type=int, default=2,
+                        help="Staged files allowed to wait for a free process")
+    parser.add_argument("--disk-budget-gb", type=float, default=8.0,
+                        help="Upper bound for staged WARC files on disk")
+    parser.add_argument("--split-workers", type=int, default=0,
+                        help="Process each file in byte ranges on this many cores (sequential mode)")
+    parser.add_argument("--chunk-mb", type=int, default=64,
+                        help="Size of the byte ranges used by --split-workers")
+    parser.add_argument("--indexed", action="store_true",
+                        help="Build or reuse a sidecar record index and read only matching records")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    return parser.parse_args()
+
 def main():
-    # Base URL for the WARC files
-    base_url = "https://data.commoncrawl.org/"
+    args = parse_args()
     
     # Create downloads directory if it doesn't exist
     if not os.path.exists("downloads"):
@@ -81,27 +567,75 @@ def main():
     # Read target URLs
     target_urls = get_target_urls()
     print(f"Loaded {len(target_urls)} target URLs")
+    matcher = DomainMatcher(target_urls)
     
     # Read the lines from warc.paths
-    with open("warc.paths", "r") as f:
-        warc_files = [line.strip() for line in f.readlines()]
+    with open(args.paths, "r") as f:
+        warc_files = [line.strip() for line in f.readlines() if line.strip()]
     
     # Connect to PostgreSQL
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        if args.pipeline:
+            run_pipeline(
+                warc_files,
+                matcher,
+                source=args.source,
+                download_workers=args.download_workers,
+                process_workers=args.process_workers,
+                prefetch=args.prefetch,
+                disk_budget_bytes=int(args.disk_budget_gb * 1024 ** 3),
+            )
+            return
+
+        conn = get_pool().getconn()
+        manifest = IngestManifest(conn)
+        ensure_metadata_schema(conn)
         
         # Download and process each file
         for warc_file in warc_files:
-            url = base_url + warc_file
             filename = os.path.join("downloads", os.path.basename(warc_file))
+            entry = manifest.get(warc_file)
+            if entry and entry["state"] == 'processed':
+                print(f"Skipping {warc_file}, already processed ({entry['page_count']} pages)")
+                continue
+            
+            index_file = get_index_path(warc_file, args.index_dir)
             
-            print(f"\nDownloading {warc_file}...")
             try:
-                download_file(url, filename)
-                print(f"Successfully downloaded {filename}")
+                if args.indexed and os.path.exists(index_file) and not IngestManifest.is_staged(entry, filename):
+                    # Indexed by an earlier run: read only the matching
+                    # records from the source, no download needed
+                    reader = open_record_reader(args.source, warc_file)
+                    try:
+                        process_warc_file_indexed(reader, load_index(index_file), matcher, conn,
+                                                  manifest=manifest, warc_path=warc_file)
+                    finally:
+                        reader.close()
+                    continue
+
+                if IngestManifest.is_staged(entry, filename):
+                    print(f"\nReusing staged {filename}")
+                else:
+                    print(f"\nDownloading {warc_file}...")
+                    fetch_warc_file(args.source, warc_file, filename)
+                    print(f"Successfully downloaded {filename}")
+                    manifest.mark_downloaded(warc_file, os.path.getsize(filename))
                 
                 # Process the downloaded file
-                process_warc_file(filename, target_urls, conn)
+                if args.indexed:
+                    index_entries = load_or_build_index(filename, index_file)
+                    reader = LocalRecordReader(filename)
+                    try:
+                        process_warc_file_indexed(reader, index_entries, matcher, conn,
+                                                  manifest=manifest, warc_path=warc_file)
+                    finally:
+                        reader.close()
+                elif args.split_workers:
+                    process_warc_file_parallel(filename, matcher, manifest, warc_file,
+                                               workers=args.split_workers,
+                                               chunk_bytes=args.chunk_mb * 1024 ** 2)
+                else:
+                    process_warc_file(filename, matcher, conn, manifest=manifest, warc_path=warc_file)
                 
                 # Delete the file after processing
                 os.remove(filename)
@@ -118,7 +652,7 @@ def main():
         print(f"Database connection error: {str(e)}")
     finally:
         if 'conn' in locals():
-            conn.close()
+            get_pool().putconn(conn)
         
         # Clean up downloads directory if it's empty
         if os.path.exists("downloads") and not os.listdir("downloads"):
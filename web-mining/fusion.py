@@ -0,0 +1,80 @@
+import numpy as np
+
+# Reciprocal-rank fusion sabiti (Cormack vd.'nin önerdiği değer)
+RRF_K = 60
+
+FUSION_METHODS = ("minmax", "rrf")
+
+def minmax_normalize(values):
+    """
+    bm25_implementation.normalize'ın vektörel karşılığı: NaN (skoru yok)
+    olanlar hariç min-max, skoru olmayanlar ve tüm skorlar eşitse 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    result = np.zeros(len(values))
+    if not present.any():
+        return result
+    lo, hi = values[present].min(), values[present].max()
+    if hi > lo:
+        result[present] = (values[present] - lo) / (hi - lo)
+    return result
+
+def reciprocal_ranks(values, rrf_k=RRF_K):
+    """
+    1 / (rrf_k + sıra); sıra, skoru olanlar arasında büyükten küçüğe
+    1'den başlar. Skoru olmayanlar 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = np.flatnonzero(~np.isnan(values))
+    result = np.zeros(len(values))
+    order = present[np.argsort(-values[present], kind="stable")]
+    result[order] = 1.0 / (rrf_k + np.arange(1, len(order) + 1))
+    return result
+
+def fuse_scores(signals, weights, method="minmax", rrf_k=RRF_K):
+    """
+    Aynı aday listesine hizalanmış skor dizilerini ağırlıklı birleştirir.
+
+    Args:
+        signals: Her sinyal için aday sayısı uzunluğunda dizi; skoru
+            olmayan adaylar NaN
+        weights: Sinyal başına ağırlık
+        method: "minmax" (ağırlıklı min-max, mevcut davranış) ya da "rrf"
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"unknown fusion method: {method}")
+    transform = minmax_normalize if method == "minmax" else (lambda values: reciprocal_ranks(values, rrf_k))
+    fused = None
+    for values, weight in zip(signals, weights):
+        contribution = weight * transform(values)
+        fused = contribution if fused is None else fused + contribution
+    return fused
+
+def top_k(doc_ids, scores, k=None):
+    """
+    Skora göre azalan (doc_id, score); k verilirse argpartition ile sadece
+    ilk k sıralanır. Eşit skorlar adayların verildiği sırada kalır (sorted
+    ile aynı).
+    """
+    doc_ids = np.asarray(doc_ids)
+    scores = np.asarray(scores, dtype=np.float64)
+    positions = np.arange(len(scores))
+    if k is not None and k < len(scores):
+        if k <= 0:
+            return []
+        kth = np.partition(-scores, k - 1)[k - 1]
+        # Sınırdaki eşit skorlardan aday sırasında öndekiler kalır
+        positions = np.flatnonzero(-scores < kth)
+        ties = np.flatnonzero(-scores == kth)[:k - len(positions)]
+        positions = np.concatenate([positions, ties])
+    order = positions[np.lexsort((positions, -scores[positions]))]
+    return list(zip(doc_ids[order].tolist(), scores[order].tolist()))
+
+def fuse(doc_ids, signals, weights, method="minmax", k=None, rrf_k=RRF_K):
+    """
+    fuse_scores + top_k
+    """
+    if len(doc_ids) == 0:
+        return []
+    return top_k(doc_ids, fuse_scores(signals, weights, method, rrf_k), k)
@@ -0,0 +1,212 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# networkx'in varsayılanları
+PAGERANK_ALPHA = 0.85
+PAGERANK_TOL = 1e-6
+PAGERANK_MAX_ITER = 100
+HITS_TOL = 1e-8
+HITS_MAX_ITER = 1000
+# HITS warm start'ında başlangıç vektörüne karıştırılan düz vektör payı
+HITS_UNIFORM_MIX = 0.1
+# Özdeğerleri bu göreli farktan yakın bileşenler eşit sayılır
+EIGENVALUE_RTOL = 1e-6
+
+class LinkGraph:
+    """
+    Sayfalar arası bağlantıların SciPy CSR komşuluk matrisi.
+
+    Düğümler en az bir kenarı olan dokümanlardır (networkx'te add_edge ile
+    kurulan graf gibi); i. düğümün doc_id'si doc_ids[i]'dir. Aynı kenar
+    birden çok kez verilirse tek sayılır.
+    """
+    def __init__(self, sources, targets):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        self.doc_ids = np.unique(np.concatenate([sources, targets]))
+        n = len(self.doc_ids)
+        rows = np.searchsorted(self.doc_ids, sources)
+        cols = np.searchsorted(self.doc_ids, targets)
+        # Tekrarlanan kenarlar tek bir (satır, sütun) anahtarına iner
+        edges = np.unique(rows * n + cols)
+        self.adjacency = sparse.csr_matrix(
+            (np.ones(len(edges)), (edges // n, edges % n)) if n else ([], ([], [])),
+            shape=(n, n),
+        )
+
+    @property
+    def node_count(self):
+        return self.adjacency.shape[0]
+
+    @property
+    def edge_count(self):
+        return self.adjacency.nnz
+
+    @classmethod
+    def from_csr(cls, doc_ids, indptr, indices):
+        graph = cls.__new__(cls)
+        graph.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        n = len(graph.doc_ids)
+        graph.adjacency = sparse.csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices), np.asarray(indptr)), shape=(n, n)
+        )
+        return graph
+
+    def to_dict(self, scores):
+        return dict(zip(self.doc_ids.tolist(), scores.tolist()))
+
+    def align(self, previous):
+        """
+        Önceki çalıştırmanın doc_id → skor sözlüğünü bu grafın düğüm
+        sırasına dizer. Grafta yeni olan düğümler NaN'dır.
+        """
+        values = np.full(self.node_count, np.nan)
+        if not previous or not self.node_count:
+            return values
+        doc_ids = np.fromiter(previous.keys(), dtype=np.int64, count=len(previous))
+        scores = np.fromiter(previous.values(), dtype=np.float64, count=len(previous))
+        positions = np.minimum(np.searchsorted(self.doc_ids, doc_ids), self.node_count - 1)
+        known = self.doc_ids[positions] == doc_ids
+        values[positions[known]] = scores[known]
+        return values
+
+def warm_start(graph, previous, new_node_score=None):
+    """
+    Önceki skorlardan başlangıç vektörü. Yeni düğümler new_node_score
+    (verilmezse önceki skorların ortalaması) alır; önceki skorlarla hiç
+    ortak düğüm yoksa None (düz başlangıç).
+
+    Returns:
+        (nstart, new_nodes)
+    """
+    values = graph.align(previous)
+    new = np.isnan(values)
+    if new.all():
+        return None, int(new.sum())
+    values[new] = values[~new].mean() if new_node_score is None else new_node_score
+    return values, int(new.sum())
+
+def pagerank(graph, alpha=PAGERANK_ALPHA, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER, nstart=None):
+    """
+    Power iteration ile PageRank (nx.pagerank ile aynı tanım).
+
+    Çıkış linki olmayan (dangling) düğümlerin skoru bütün düğümlere eşit
+    dağıtılır. L1 farkı N * tol'un altına inince durur. nstart verilirse
+    (ör. warm_start ile önceki skorlar) iterasyon düz vektör yerine ondan
+    başlar; sonuç aynı noktaya yakınsar, sadece iterasyon sayısı değişir.
+
+    Returns:
+        (scores, stats): doc_ids sırasında skorlar (toplamı 1) ve
+        {"iterations", "residual", "converged"}
+    """
+    n = graph.node_count
+    if n == 0:
+        return np.zeros(0), {"iterations": 0, "residual": 0.0, "converged": True}
+
+    out_degree = np.asarray(graph.adjacency.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inverse_degree = np.zeros(n)
+    inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+    # x_yeni[j] = sum_i x[i] / outdeg(i), i → j kenarları üzerinden
+    transposed = graph.adjacency.T.tocsr()
+
+    if nstart is None or not nstart.sum() > 0:
+        x = np.full(n, 1.0 / n)
+    else:
+        x = np.asarray(nstart, dtype=np.float64) / nstart.sum()
+    residual = 0.0
+    for iteration in range(1, max_iter + 1):
+        last = x
+        x = alpha * (transposed @ (last * inverse_degree) + last[dangling].sum() / n) + (1 - alpha) / n
+        residual = float(np.abs(x - last).sum())
+        if residual < n * tol:
+            return x, {"iterations": iteration, "residual": residual, "converged": True}
+    return x, {"iterations": max_iter, "residual": residual, "converged": False}
+
+def cocitation_components(adjacency):
+    """
+    Authority'leri ortak hub'lar üzerinden bağlı bileşenlere ayırır (her
+    düğümün hub ve authority rolü ayrı düğümdür).
+
+    Returns:
+        (hub_labels, authority_labels, count)
+    """
+    n = adjacency.shape[0]
+    bipartite = sparse.bmat([[None, adjacency], [adjacency.T, None]], format="csr")
+    count, labels = csgraph.connected_components(bipartite, directed=False)
+    return labels[:n], labels[n:], count
+
+def match_cold_start(adjacency, authorities):
+    """
+    Yakınsamış authority vektörünü düz başlangıçtan elde edilecek olana
+    çevirir.
+
+    A^T A'nın baskın özdeğeri birden çok bileşende aynıysa (ör. iki eş
+    yıldız) HITS'in tek bir sabit noktası yoktur: bu bileşenlerin
+    birbirine oranı başlangıç vektöründen gelir. Düz başlangıçta baskın
+    bileşen c'nin bloğu (v_c · 1) v_c'dir; blok α v_c ise toplam / kareler
+    toplamı ile çarpılarak aynı bloğa getirilir. Baskın olmayan bileşenler
+    her iki durumda da sıfıra yakındır ve olduğu gibi kalır.
+    """
+    hub_labels, authority_labels, count = cocitation_components(adjacency)
+    hubs = adjacency @ authorities
+    norms = np.bincount(authority_labels, weights=authorities ** 2, minlength=count)
+    masses = np.bincount(authority_labels, weights=authorities, minlength=count)
+    # Bileşenin Rayleigh bölümü: ||A a_c||² / ||a_c||²
+    eigenvalues = np.zeros(count)
+    present = norms > 0
+    eigenvalues[present] = np.bincount(hub_labels, weights=hubs ** 2, minlength=count)[present] / norms[present]
+    dominant = present & (eigenvalues >= eigenvalues.max() * (1 - EIGENVALUE_RTOL))
+    scale = np.ones(count)
+    scale[dominant] = masses[dominant] / norms[dominant]
+    return authorities * scale[authority_labels]
+
+def hits(graph, tol=HITS_TOL, max_iter=HITS_MAX_ITER, nstart=None):
+    """
+    Sırayla A^T h ve A a çarpımlarıyla HITS. Her adımda vektörler en büyük
+    elemanlarına bölünür; authority vektörünün L1 farkı tol'un altına
+    inince durur. Sonuçlar nx.hits(normalized=True) gibi toplamı 1 olacak
+    şekilde ölçeklenir.
+
+    nstart başlangıç authority vektörüdür (warm start). Önceki çalıştırmada
+    sıfıra inmiş bileşenler yeni grafta baskın olabileceği için nstart'a
+    HITS_UNIFORM_MIX oranında düz vektör karıştırılır ve sonuç
+    match_cold_start ile düz başlangıcın sonucuna getirilir. Eşit baskın
+    bileşenler arasındaki oran sadece yakınsamadan sonra düzeltilebilir;
+    max_iter'a ulaşılırsa sonuç düz başlangıçtan farklı olabilir.
+
+    Returns:
+        (hubs, authorities, stats)
+    """
+    n = graph.node_count
+    if n == 0:
+        return np.zeros(0), np.zeros(0), {"iterations": 0, "residual": 0.0, "converged": True}
+
+    adjacency = graph.adjacency
+    transposed = adjacency.T.tocsr()
+    warm = nstart is not None and nstart.max() > 0
+    if warm:
+        authorities = (1 - HITS_UNIFORM_MIX) * np.asarray(nstart, dtype=np.float64) / nstart.max() + HITS_UNIFORM_MIX
+    else:
+        authorities = np.full(n, 1.0 / n)
+    residual = 0.0
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        hubs = adjacency @ authorities
+        hubs /= hubs.max() or 1.0
+        last = authorities
+        authorities = transposed @ hubs
+        authorities /= authorities.max() or 1.0
+        residual = float(np.abs(authorities - last).sum())
+        if residual < tol:
+            converged = True
+            break
+
+    if warm and converged:
+        authorities = match_cold_start(adjacency, authorities)
+    hubs = adjacency @ authorities
+    hubs /= hubs.sum() or 1.0
+    authorities = authorities / (authorities.sum() or 1.0)
+    return hubs, authorities, {"iterations": iteration, "residual": residual, "converged": converged}
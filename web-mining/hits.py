@@ -1,29 +1,40 @@
-import psycopg2
-from config import DB_CONFIG
-from bm25_implementation import get_links
-import networkx as nx
+import argparse
+import os
+from db_pool import connection
+from static_scores import ensure_score_schema, publish_score_generation
+from graph_rank import hits, warm_start, HITS_TOL, HITS_MAX_ITER
+from link_graph import load_link_graph, GRAPH_FILE
 from tqdm import tqdm
 
-def calculate_hits(conn):
-    df = get_links(conn)
-    G = nx.DiGraph()
-    url_to_id = dict(zip(df['url'], df['id']))
-
-    for _, row in df.iterrows():
-        source_id = row['id']
-        links = row['links']
-        if not links:
-            continue
+def load_previous_authorities(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT doc_id, authority_score FROM hits")
+    previous = dict(cursor.fetchall())
+    cursor.close()
+    return previous
 
-        for target_url in links:
-            target_id = url_to_id.get(target_url)
-            if target_id:
-                G.add_edge(source_id, target_id)
-                
-    hubs, authorities = nx.hits(G, max_iter=1000, normalized=True)
-    return hubs, authorities
+def calculate_hits(conn, tol=HITS_TOL, max_iter=HITS_MAX_ITER, graph_path=GRAPH_FILE, rebuild_graph=False,
+                   incremental=False):
+    """
+    incremental=True ise iterasyon hits tablosundaki önceki authority
+    skorlarından başlar; yeni düğümler önceki skorların ortalamasını alır.
+    Graf birden çok eş bileşene ayrılıyorsa sonuç düz başlangıçla ancak
+    iterasyon yakınsarsa aynıdır (graph_rank.hits).
+    """
+    graph = load_link_graph(conn, graph_path, rebuild_graph)
+    nstart = None
+    if incremental:
+        nstart, new_nodes = warm_start(graph, load_previous_authorities(conn))
+        print(f"Warm start: {new_nodes} new nodes" if nstart is not None else "Warm start: no previous scores")
+    hubs, authorities, stats = hits(graph, tol=tol, max_iter=max_iter, nstart=nstart)
+    print(f"HITS: {graph.node_count} nodes, {graph.edge_count} edges, "
+          f"{stats['iterations']} iterations, residual {stats['residual']:.2e}")
+    if not stats["converged"]:
+        print(f"Uyarı: HITS {max_iter} iterasyonda yakınsamadı")
+    return graph.to_dict(hubs), graph.to_dict(authorities)
 
 def save_hits_scores(conn, hubs, authorities):
+    ensure_score_schema(conn)
     cursor = conn.cursor()
     
     # Önce tabloyu temizleyelim
@@ -34,11 +45,22 @@ def save_hits_scores(conn, hubs, authorities):
         hub_score = hubs[doc_id]
         authority_score = authorities[doc_id]
         cursor.execute("INSERT INTO hits (doc_id, hub_score, authority_score) VALUES (%s, %s, %s)", (doc_id, hub_score, authority_score))
+    # Arama tarafı yeni skorları generation değişince yükler
+    publish_score_generation(cursor, "hits")
     conn.commit()
     cursor.close()
-    conn.close()
 
 if __name__ == "__main__":
-    conn = psycopg2.connect(**DB_CONFIG)
-    hubs, authorities = calculate_hits(conn)
-    save_hits_scores(conn, hubs, authorities)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="pages_cleaned.links → hits tablosu")
+    parser.add_argument("--tol", type=float, default=HITS_TOL)
+    parser.add_argument("--max-iter", type=int, default=HITS_MAX_ITER)
+    parser.add_argument("--graph", default=os.getenv("LINK_GRAPH_PATH", GRAPH_FILE))
+    parser.add_argument("--rebuild-graph", action="store_true")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Önceki authority skorlarından başla (yeni ingest sonrası)")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        hubs, authorities = calculate_hits(conn, args.tol, args.max_iter, args.graph, args.rebuild_graph,
+                                           args.incremental)
+        save_hits_scores(conn, hubs, authorities)
\ No newline at end of file
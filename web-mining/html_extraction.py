@@ -0,0 +1,129 @@
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # BeautifulSoup's html.parser is used instead
+    etree = None
+
+PageContent = namedtuple("PageContent", ["title", "text", "links"])
+
+# Metin çıkarımında atlanan etiketler
+SKIPPED_TAGS = {"script", "style", "noscript"}
+
+if etree is not None:
+    # Sayfalar veritabanında str olarak duruyor; UTF-8 olarak parse edilir
+    # ki <meta charset> veya XML bildirimi encoding'i değiştirmesin
+    _HTML_PARSER = etree.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+
+def _resolve_link(base_url, href):
+    href = urljoin(base_url, href.strip())  # relative → absolute
+    if urlparse(href).scheme in ['http', 'https']:
+        return href
+    return None
+
+def _extract_with_lxml(html_content, base_url):
+    root = etree.fromstring(html_content.encode("utf-8", errors="ignore"), _HTML_PARSER)
+    if root is None:
+        return PageContent("", "", [])
+
+    title = None
+    texts = []
+    links = []
+
+    # Tek geçişte metin, başlık ve linkler. Yığında ya element ya da
+    # metin parçası durur; sıra belge sırasıyla aynıdır.
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            node = node.strip()
+            if node:
+                texts.append(node)
+            continue
+
+        if node.tail:
+            stack.append(node.tail)
+        tag = node.tag
+        if not isinstance(tag, str) or tag in SKIPPED_TAGS:
+            continue
+
+        if tag == "a":
+            href = node.get("href")
+            if href is not None:
+                link = _resolve_link(base_url, href)
+                if link:
+                    links.append(link)
+        elif tag == "title" and title is None:
+            title = node.text
+
+        stack.extend(reversed(node))
+        if node.text:
+            stack.append(node.text)
+
+    return PageContent(title if title is not None else "", " ".join(texts), links)
+
+def _extract_with_bs4(html_content, base_url):
+    soup = BeautifulSoup(html_content, "html.parser")
+    title = soup.title.string if soup.title else ''
+
+    # Metin çıkarımı
+    for tag in soup(list(SKIPPED_TAGS)):
+        tag.extract()
+
+    text = soup.get_text(separator=' ', strip=True)
+
+    # Hyperlink çıkarımı
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        link = _resolve_link(base_url, a_tag['href'])
+        if link:
+            links.append(link)
+
+    return PageContent(title or '', text, links)
+
+def extract_page_content(html_content, base_url):
+    """
+    HTML'den başlık, görünür metin ve mutlak linkleri tek geçişte çıkarır.
+
+    lxml (C tabanlı parser) kuruluysa onu kullanır, değilse ya da lxml
+    sayfayı parse edemezse BeautifulSoup ile aynı sonucu üretir.
+
+    Args:
+        html_content (str): Sayfanın HTML'i
+        base_url (str): Göreli linklerin çözüleceği sayfa URL'i
+
+    Returns:
+        PageContent: (title, text, links)
+    """
+    if etree is not None:
+        try:
+            return _extract_with_lxml(html_content, base_url)
+        except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+            pass
+    return _extract_with_bs4(html_content, base_url)
+
+def extract_title(html_content):
+    """
+    Sadece <title>. lxml ile belge ilk <title> kapanana kadar okunur,
+    sayfanın geri kalanı parse edilmez.
+    """
+    if etree is None:
+        soup = BeautifulSoup(html_content, "html.parser")
+        return soup.title.string if soup.title else ''
+
+    parser = etree.HTMLPullParser(events=("end",), tag="title", encoding="utf-8")
+    data = html_content.encode("utf-8", errors="ignore")
+    chunk_size = 16 * 1024
+    try:
+        for start in range(0, len(data), chunk_size):
+            parser.feed(data[start:start + chunk_size])
+            for _, element in parser.read_events():
+                return element.text or ''
+        parser.close()
+        for _, element in parser.read_events():
+            return element.text or ''
+    except (etree.ParserError, etree.XMLSyntaxError):
+        pass
+    return ''
@@ -0,0 +1,151 @@
+import os
+
+class IngestManifest:
+    """
+    Per-WARC ingestion state kept in the `ingest_manifest` table.
+
+    state is 'downloaded' once the file is staged locally, 'processing' after
+    the first committed page batch and 'processed' when the whole file is
+    done. Checkpoints are written with the page batch they describe, in the
+    same transaction, so the manifest never points past pages that were
+    rolled back and a resumed run never inserts a page twice.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.ensure_table()
+
+    def ensure_table(self):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_manifest (
+                    warc_path text PRIMARY KEY,
+                    state text NOT NULL,
+                    size bigint,
+                    page_count integer NOT NULL DEFAULT 0,
+                    last_offset bigint,
+                    last_length bigint,
+                    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+        self.conn.commit()
+
+    def load(self):
+        """
+        Returns {warc_path: {state, size, page_count, last_offset, last_length}}
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT warc_path, state, size, page_count, last_offset, last_length
+                FROM ingest_manifest
+            """)
+            rows = cur.fetchall()
+        return {
+            row[0]: {
+                "state": row[1],
+                "size": row[2],
+                "page_count": row[3],
+                "last_offset": row[4],
+                "last_length": row[5],
+            }
+            for row in rows
+        }
+
+    def get(self, warc_path):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT state, size, page_count, last_offset, last_length
+                FROM ingest_manifest WHERE warc_path = %s
+            """, (warc_path,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "state": row[0],
+            "size": row[1],
+            "page_count": row[2],
+            "last_offset": row[3],
+            "last_length": row[4],
+        }
+
+    def processed_paths(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT warc_path FROM ingest_manifest WHERE state = 'processed'")
+            return {row[0] for row in cur.fetchall()}
+
+    def mark_downloaded(self, warc_path, size):
+        # A file that already has committed pages stays 'processing'
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ingest_manifest (warc_path, state, size)
+                VALUES (%s, 'downloaded', %s)
+                ON CONFLICT (warc_path) DO UPDATE
+                SET size = EXCLUDED.size,
+                    state = CASE WHEN ingest_manifest.state = 'processing'
+                                 THEN 'processing' ELSE 'downloaded' END,
+                    updated_at = CURRENT_TIMESTAMP;
+            """, (warc_path, size))
+        self.conn.commit()
+
+    def checkpoint(self, cur, warc_path, pages, offset, length):
+        """
+        Record a committed page batch. Runs on the batch's cursor and does
+        not commit; the caller commits pages and checkpoint together.
+        """
+        cur.execute("""
+            INSERT INTO ingest_manifest (warc_path, state, page_count, last_offset, last_length)
+            VALUES (%s, 'processing', %s, %s, %s)
+            ON CONFLICT (warc_path) DO UPDATE
+            SET state = 'processing',
+                page_count = ingest_manifest.page_count + EXCLUDED.page_count,
+                last_offset = EXCLUDED.last_offset,
+                last_length = EXCLUDED.last_length,
+                updated_at = CURRENT_TIMESTAMP;
+        """, (warc_path, pages, offset, length))
+
+    def mark_processed(self, warc_path, page_count=None):
+        # page_count is only passed when the pages were counted elsewhere,
+        # e.g. under the keys of a file's byte ranges
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ingest_manifest (warc_path, state, page_count)
+                VALUES (%s, 'processed', COALESCE(%s, 0))
+                ON CONFLICT (warc_path) DO UPDATE
+                SET state = 'processed',
+                    page_count = COALESCE(%s, ingest_manifest.page_count),
+                    updated_at = CURRENT_TIMESTAMP;
+            """, (warc_path, page_count, page_count))
+        self.conn.commit()
+
+    def chunk_page_count(self, warc_path):
+        """
+        Pages committed under the byte-range keys (warc_path#start) of a file
+        """
+        prefix = warc_path + '#'
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT COALESCE(SUM(page_count), 0) FROM ingest_manifest
+                WHERE left(warc_path, length(%s)) = %s
+            """, (prefix, prefix))
+            return cur.fetchone()[0]
+
+    def resume_offset(self, warc_path):
+        """
+        Byte offset just past the last committed record, 0 for a fresh file
+        """
+        entry = self.get(warc_path)
+        if not entry or entry["last_offset"] is None:
+            return 0
+        return entry["last_offset"] + entry["last_length"]
+
+    @staticmethod
+    def is_staged(entry, filename):
+        """
+        True if `filename` is a complete local copy left by an earlier run
+        """
+        return (
+            entry is not None
+            and entry["state"] in ('downloaded', 'processing')
+            and entry["size"] is not None
+            and os.path.exists(filename)
+            and os.path.getsize(filename) == entry["size"]
+        )
@@ -1,150 +1,194 @@
-from collections import defaultdict, Counter
-import psycopg2
+from collections import Counter
+from psycopg2.extras import execute_values
 from tqdm import tqdm
-import pickle
 import io
 import csv
+import argparse
 
-from config import DB_CONFIG
+from db_pool import get_pool
+from change_tracking import ensure_tracking_schema, reset_corpus_stats, apply_corpus_delta, rebuild_term_stats
+from spimi import SpimiIndexer, LineStream, DEFAULT_MEMORY_BUDGET
 
-def process_in_chunks(batch_size=1000):
-    # Veritabanı bağlantısı
-    conn = psycopg2.connect(**DB_CONFIG)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def build_index(batch_size=1000, memory_budget=DEFAULT_MEMORY_BUDGET, tmp_dir=None):
+    """
+    inverted_index ve doc_lengths tablolarını baştan kurar.
+
+    pages_cleaned keyset sayfalama ile okunur, posting'ler SpimiIndexer ile
+    bellek bütçesi dolunca sıralı run dosyalarına dökülür. Run'ların k-way
+    merge'ü doğrudan COPY'ye akıtılır; (term, doc_id) sıralı geldiği için
+    primary key index'i de sırayla dolar. TRUNCATE, COPY'ler, term_stats ve
+    corpus_stats tek transaction'dadır, yarım bir indeks görünmez.
+    """
+    conn = get_pool().getconn()
     cursor = conn.cursor()
-    
-    # Ters dizin sözlüğü
-    inverted_index = defaultdict(list)
 
-    # Belge uzunluklarını da tutalım (BM25 için)
-    doc_lengths = {}
-    
     try:
-        # Toplam kayıt sayısını al
-        cursor.execute("SELECT COUNT(*) FROM pages_cleaned")
-        total_records = cursor.fetchone()[0]
-        print("total_records: ",total_records)
-        
-        # Offset ile parça parça veri çek
-        offset = 0
-        with tqdm(total=total_records, desc="İşlenen Kayıtlar") as pbar:
-            while True:
-                # Belirli sayıda kayıt çek
-                cursor.execute(f"SELECT id, tokens FROM pages_cleaned ORDER BY id LIMIT {batch_size} OFFSET {offset}")
-                rows = cursor.fetchall()
-                
-                if not rows:
-                    break
+        ensure_tracking_schema(conn)
+        with SpimiIndexer(memory_budget, tmp_dir) as indexer:
+            cursor.execute("SELECT COUNT(*) FROM pages_cleaned")
+            total_records = cursor.fetchone()[0]
+            print("total_records: ", total_records)
 
-                for row in rows:
-                    doc_id = row[0]
-                    tokens = row[1]
-                    freq = Counter(tokens)
-                    doc_lengths[doc_id] = sum(freq.values())
-                    
-                    for term, count in freq.items():
-                        inverted_index[term].append((doc_id, count))
-                
-                pbar.update(len(rows))
-                offset += batch_size
-                    
-    except Exception as e:
-        print(f"Hata: {e}")
-    finally:
-        conn.close()
-        
-    return inverted_index, doc_lengths
+            last_id = 0
+            with tqdm(total=total_records, desc="İşlenen Kayıtlar") as pbar:
+                while True:
+                    cursor.execute(
+                        "SELECT id, tokens FROM pages_cleaned WHERE id > %s ORDER BY id LIMIT %s",
+                        (last_id, batch_size)
+                    )
+                    rows = cursor.fetchall()
+
+                    if not rows:
+                        break
+
+                    for doc_id, tokens in rows:
+                        indexer.add_document(doc_id, tokens)
+
+                    pbar.update(len(rows))
+                    last_id = rows[-1][0]
+
+            print("doc_lengths length: ", indexer.doc_count)
+            print("postings: ", indexer.posting_count, "runs: ", len(indexer.runs))
+
+            cursor.execute("TRUNCATE TABLE inverted_index, doc_lengths")
+
+            with indexer.open_doc_lengths() as lengths:
+                cursor.copy_expert("COPY doc_lengths (doc_id, length) FROM STDIN", lengths)
+
+            postings = tqdm(indexer.merged_postings(), total=indexer.posting_count,
+                            desc="Writing Inverted Index")
+            cursor.copy_expert(
+                "COPY inverted_index (term, doc_id, freq) FROM STDIN",
+                LineStream(postings),
+                size=COPY_BUFFER_SIZE
+            )
+
+            rebuild_term_stats(cursor)
+            reset_corpus_stats(cursor, indexer.doc_count, indexer.total_length)
+            conn.commit()
 
-def save_inverted_index(inverted_index):
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    try:
-        # Önce tabloyu temizleyelim
-        cursor.execute("TRUNCATE TABLE inverted_index")
-        
-        # Veriyi CSV formatında bir StringIO nesnesine yazalım
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Veriyi hazırla
-        total_items = sum(len(postings) for postings in inverted_index.values())
-        with tqdm(total=total_items, desc="Preparing Inverted Index Data") as pbar:
-            for term, postings in inverted_index.items():
-                for doc_id, freq in postings:
-                    writer.writerow([term, doc_id, freq])
-                    pbar.update(1)
-        
-        # StringIO'yu başa sar
-        output.seek(0)
-        
-        # COPY komutu ile veriyi yükle
-        cursor.copy_from(
-            output,
-            'inverted_index',
-            sep=',',
-            columns=('term', 'doc_id', 'freq')
-        )
-        conn.commit()
-        
     except Exception as e:
-        print(f"Hata oluştu: {e}")
+        print(f"Hata: {e}")
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
+
+# pages_cleaned'de indekslenmemiş ya da indekslendikten sonra tekrar
+# temizlenmiş dokümanlar
+CHANGED_DOCS_FILTER = """
+    NOT EXISTS (
+        SELECT 1 FROM doc_lengths d
+        WHERE d.doc_id = c.id AND d.indexed_at >= c.updated_at
+    )
+"""
 
-def save_doc_lengths(doc_lengths):
-    conn = psycopg2.connect(**DB_CONFIG)
+def merge_postings(cursor, rows):
+    """
+    (doc_id, tokens) satırlarının eski posting'lerini ve uzunluklarını
+    silip yenilerini COPY ile yazar, term_stats ve corpus_stats'ı farka göre
+    günceller. Commit çağıran tarafta yapılır.
+    """
+    doc_ids = [doc_id for doc_id, _ in rows]
+
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM doc_lengths WHERE doc_id = ANY(%s)",
+        (doc_ids,)
+    )
+    old_docs, old_length = cursor.fetchone()
+    cursor.execute("""
+        UPDATE term_stats t SET df = t.df - o.df
+        FROM (
+            SELECT term, COUNT(*) AS df FROM inverted_index
+            WHERE doc_id = ANY(%s) GROUP BY term
+        ) o
+        WHERE t.term = o.term
+    """, (doc_ids,))
+    cursor.execute("DELETE FROM inverted_index WHERE doc_id = ANY(%s)", (doc_ids,))
+    cursor.execute("DELETE FROM doc_lengths WHERE doc_id = ANY(%s)", (doc_ids,))
+
+    postings = io.StringIO()
+    postings_writer = csv.writer(postings)
+    lengths = io.StringIO()
+    lengths_writer = csv.writer(lengths)
+    new_length = 0
+    term_dfs = Counter()
+    for doc_id, tokens in rows:
+        freq = Counter(tokens or [])
+        term_dfs.update(freq.keys())
+        length = sum(freq.values())
+        new_length += length
+        lengths_writer.writerow([doc_id, length])
+        for term, count in freq.items():
+            postings_writer.writerow([term, doc_id, count])
+
+    lengths.seek(0)
+    cursor.copy_expert("COPY doc_lengths (doc_id, length) FROM STDIN WITH (FORMAT csv)", lengths)
+    postings.seek(0)
+    cursor.copy_expert("COPY inverted_index (term, doc_id, freq) FROM STDIN WITH (FORMAT csv)", postings)
+
+    execute_values(cursor, """
+        INSERT INTO term_stats (term, df) VALUES %s
+        ON CONFLICT (term) DO UPDATE SET df = term_stats.df + EXCLUDED.df
+    """, list(term_dfs.items()), page_size=1000)
+
+    apply_corpus_delta(cursor, len(rows) - old_docs, new_length - old_length)
+
+def update_index_incremental(batch_size=1000):
+    """
+    Sadece yeni ya da değişmiş dokümanları indeksler. Her batch'in eski
+    posting'leri silinip yenileri eklenir; N ve ortalama uzunluk
+    corpus_stats'ta farkla güncellenir, tablolar TRUNCATE edilmez.
+    """
+    conn = get_pool().getconn()
     cursor = conn.cursor()
+
     try:
-        # Önce tabloyu temizleyelim
-        cursor.execute("TRUNCATE TABLE doc_lengths")
-        
-        # Veriyi CSV formatında bir StringIO nesnesine yazalım
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Veriyi hazırla
-        total_items = len(doc_lengths)
-        with tqdm(total=total_items, desc="Preparing Document Lengths Data") as pbar:
-            for doc_id, length in doc_lengths.items():
-                writer.writerow([doc_id, length])
-                pbar.update(1)
-        
-        # StringIO'yu başa sar
-        output.seek(0)
-        
-        # COPY komutu ile veriyi yükle
-        cursor.copy_from(
-            output,
-            'doc_lengths',
-            sep=',',
-            columns=('doc_id', 'length')
-        )
-        conn.commit()
-        
+        ensure_tracking_schema(conn)
+        cursor.execute(f"SELECT COUNT(*) FROM pages_cleaned c WHERE {CHANGED_DOCS_FILTER}")
+        total_records = cursor.fetchone()[0]
+        print("changed records: ", total_records)
+
+        last_id = 0
+        with tqdm(total=total_records, desc="İşlenen Kayıtlar") as pbar:
+            while True:
+                cursor.execute(f"""
+                    SELECT c.id, c.tokens FROM pages_cleaned c
+                    WHERE c.id > %s AND {CHANGED_DOCS_FILTER}
+                    ORDER BY c.id LIMIT %s
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+
+                if not rows:
+                    break
+
+                merge_postings(cursor, rows)
+                conn.commit()
+
+                pbar.update(len(rows))
+                last_id = rows[-1][0]
+
     except Exception as e:
-        print(f"Hata oluştu: {e}")
+        print(f"Hata: {e}")
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
 
 if __name__ == "__main__":
-    inverted_index, doc_lengths = process_in_chunks(batch_size=1000)
-
-    print("inverted_index length: ", len(inverted_index))
-    print("doc_lengths length: ", len(doc_lengths))
-
-    # print(doc_lengths.items())
-    # print(len(doc_lengths.items()))
-
-    with open("inverted_index.pkl", "wb") as f:
-        pickle.dump(inverted_index, f)
-        print("inverted_index.pkl saved")
-
-    with open("doc_lengths.pkl", "wb") as f:
-        pickle.dump(doc_lengths, f)
-        print("doc_lengths.pkl saved")
+    parser = argparse.ArgumentParser(description="pages_cleaned → inverted_index / doc_lengths")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Sadece yeni ya da değişmiş dokümanları indeksle")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Run dosyasına dökülmeden önce bellekte tutulacak posting'lerin tahmini boyutu")
+    parser.add_argument("--tmp-dir", default=None,
+                        help="Run dosyalarının yazılacağı dizin (varsayılan: sistemin temp dizini)")
+    args = parser.parse_args()
 
-    save_doc_lengths(doc_lengths)
-    save_inverted_index(inverted_index)
+    if args.incremental:
+        update_index_incremental(batch_size=1000)
+    else:
+        build_index(batch_size=1000, memory_budget=args.memory_mb * 1024 * 1024,
+                    tmp_dir=args.tmp_dir)
@@ -0,0 +1,164 @@
+import os
+from urllib.parse import urlsplit
+import numpy as np
+from psycopg2 import errors
+from graph_rank import LinkGraph
+from spimi import LineStream
+
+# pagerank.py, hits.py ve diğer graf algoritmalarının okuduğu dosya
+GRAPH_FILE = "link-graph.npz"
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def normalize_url(url):
+    """
+    Aynı sayfayı gösteren linkleri aynı anahtara indirger: şema (http /
+    https), "www.", fragment, varsayılan port ve sondaki "/" yok sayılır,
+    host küçük harfe çevrilir. Query string korunur. Ayrıştırılamayan
+    URL'ler için None.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return None
+    if not host:
+        return None
+    if host.startswith("www."):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    key = host + parts.path.rstrip("/")
+    if parts.query:
+        key += "?" + parts.query
+    return key
+
+def graph_signature(conn):
+    """
+    pages_cleaned'in graf dosyasıyla karşılaştırılan özeti; sayfa eklenir
+    ya da yeniden temizlenirse değişir.
+
+    updated_at kolonunu preprocessing.py oluşturur (change_tracking);
+    burada şema değiştirilmez. Kolon henüz yoksa sadece sayı ve en büyük
+    id kullanılır.
+    """
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM pages_cleaned")
+            count, max_id, updated_at = cur.fetchone()
+        except errors.UndefinedColumn:
+            conn.rollback()
+            cur.execute("SELECT COUNT(*), MAX(id) FROM pages_cleaned")
+            (count, max_id), updated_at = cur.fetchone(), None
+    conn.commit()
+    return f"{count}:{max_id}:{updated_at.isoformat() if updated_at else ''}"
+
+def build_link_graph(conn, itersize=10_000):
+    """
+    pages_cleaned.links'i normalize edilmiş URL'ler üzerinden doc_id'lere
+    çözer. Aynı anahtara düşen birden çok sayfa varsa en küçük id'li olan
+    kullanılır. Aynı hedef URL bir kez normalize edilir.
+    """
+    url_to_id = {}
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, url FROM pages_cleaned ORDER BY id")
+        for doc_id, url in cur.fetchall():
+            key = normalize_url(url)
+            if key is not None:
+                url_to_id.setdefault(key, doc_id)
+
+    resolved = {}
+    sources = []
+    targets = []
+    with conn.cursor(name="link_graph_export") as cur:
+        cur.itersize = itersize
+        cur.execute("SELECT id, links FROM pages_cleaned WHERE links IS NOT NULL")
+        for source_id, links in cur:
+            for target_url in links:
+                target_id = resolved.get(target_url)
+                if target_id is None:
+                    target_id = resolved[target_url] = url_to_id.get(normalize_url(target_url), 0)
+                if target_id:
+                    sources.append(source_id)
+                    targets.append(target_id)
+    conn.commit()
+    return LinkGraph(sources, targets)
+
+def save_link_graph(graph, path=GRAPH_FILE, signature=""):
+    """
+    doc_ids + CSR (indptr, indices) olarak sıkıştırmasız .npz; dosya
+    önce geçici adla yazılıp yerine taşınır
+    """
+    adjacency = graph.adjacency
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, doc_ids=graph.doc_ids, indptr=adjacency.indptr.astype(np.int64),
+                 indices=adjacency.indices.astype(np.int32), signature=np.array(signature))
+    os.replace(tmp_path, path)
+
+def read_link_graph(path=GRAPH_FILE):
+    """
+    (graph, signature)
+    """
+    with np.load(path) as data:
+        graph = LinkGraph.from_csr(data["doc_ids"], data["indptr"], data["indices"])
+        return graph, str(data["signature"])
+
+def write_links_table(conn, graph):
+    """
+    Kenarları links(source_id, target_id) tablosuna baştan yazar
+    """
+    coo = graph.adjacency.tocoo()
+    sources = graph.doc_ids[coo.row].tolist()
+    targets = graph.doc_ids[coo.col].tolist()
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                source_id integer NOT NULL,
+                target_id integer NOT NULL,
+                PRIMARY KEY (source_id, target_id)
+            );
+        """)
+        cur.execute("TRUNCATE TABLE links")
+        cur.copy_expert(
+            "COPY links (source_id, target_id) FROM STDIN",
+            LineStream(f"{source}\t{target}\n" for source, target in zip(sources, targets)),
+            size=COPY_BUFFER_SIZE,
+        )
+    conn.commit()
+
+def load_link_graph(conn, path=GRAPH_FILE, rebuild=False):
+    """
+    Dosya varsa ve pages_cleaned o zamandan beri değişmediyse dosyadan
+    okur, yoksa grafı kurup dosyaya yazar
+    """
+    signature = graph_signature(conn)
+    if not rebuild and os.path.exists(path):
+        graph, saved_signature = read_link_graph(path)
+        if saved_signature == signature:
+            return graph
+        print(f"{path} güncel değil, graf yeniden kuruluyor")
+    graph = build_link_graph(conn)
+    save_link_graph(graph, path, signature)
+    return graph
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from db_pool import connection
+
+    parser = argparse.ArgumentParser(description="pages_cleaned.links → link graph dosyası")
+    parser.add_argument("--output", default=os.getenv("LINK_GRAPH_PATH", GRAPH_FILE))
+    parser.add_argument("--table", action="store_true", help="Kenarları links tablosuna da yaz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with connection() as conn:
+        signature = graph_signature(conn)
+        graph = build_link_graph(conn)
+        save_link_graph(graph, args.output, signature)
+        if args.table:
+            write_links_table(conn, graph)
+    print(f"{args.output}: {graph.node_count} nodes, {graph.edge_count} edges "
+          f"({time.perf_counter() - start:.1f}s)")
@@ -1,34 +1,40 @@
-import psycopg2
-import networkx as nx
-from bm25_implementation import get_links
-from config import DB_CONFIG
+import argparse
+import os
+from db_pool import connection
+from graph_rank import pagerank, warm_start, PAGERANK_ALPHA, PAGERANK_TOL, PAGERANK_MAX_ITER
+from link_graph import load_link_graph, GRAPH_FILE
+from static_scores import ensure_score_schema, publish_score_generation
 from tqdm import tqdm
 
-def calculate_pagerank(conn):
-    links = get_links(conn)
-    G = nx.DiGraph()
-
-    # URL → ID eşlemesi (linkler URL bazlı olduğundan)
-    url_to_id = dict(zip(links['url'], links['id']))
-
-    # Her sayfanın linklerinden kenarlar ekleniyor
-    for _, row in links.iterrows():
-        source_id = row['id']
-        out_links = row['links']
-
-        if not out_links:
-            continue
+def load_previous_pagerank(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT doc_id, score FROM pagerank")
+    previous = dict(cursor.fetchall())
+    cursor.close()
+    return previous
 
-        for target_url in out_links:
-            target_id = url_to_id.get(target_url)
-            if target_id:
-                G.add_edge(source_id, target_id)
-    
-    pagerank_scores = nx.pagerank(G, alpha=0.85)  # Damping factor 0.85 genellikle kullanılır
+def calculate_pagerank(conn, alpha=PAGERANK_ALPHA, tol=PAGERANK_TOL, max_iter=PAGERANK_MAX_ITER,
+                       graph_path=GRAPH_FILE, rebuild_graph=False, incremental=False):
+    """
+    incremental=True ise iterasyon pagerank tablosundaki önceki skorlardan
+    başlar (warm start); yeni düğümler (1 - alpha) / N ile başlar.
+    """
+    # Graf link_graph.py'nin dosyasından okunur; eskiyse yeniden kurulur
+    graph = load_link_graph(conn, graph_path, rebuild_graph)
+    nstart = None
+    if incremental and graph.node_count:
+        nstart, new_nodes = warm_start(graph, load_previous_pagerank(conn), (1 - alpha) / graph.node_count)
+        print(f"Warm start: {new_nodes} new nodes" if nstart is not None else "Warm start: no previous scores")
+    scores, stats = pagerank(graph, alpha=alpha, tol=tol, max_iter=max_iter, nstart=nstart)
+    print(f"PageRank: {graph.node_count} nodes, {graph.edge_count} edges, "
+          f"{stats['iterations']} iterations, residual {stats['residual']:.2e}")
+    if not stats["converged"]:
+        print(f"Uyarı: PageRank {max_iter} iterasyonda yakınsamadı")
 
-    return pagerank_scores
+    return graph.to_dict(scores)
 
 def save_pagerank_scores(conn, pagerank_scores):
+    ensure_score_schema(conn)
     cursor = conn.cursor()
     
     # Önce tabloyu temizleyelim
@@ -41,9 +47,10 @@ def save_pagerank_scores(conn, pagerank_scores):
             ON CONFLICT (doc_id) DO UPDATE SET score = EXCLUDED.score;
         """, (doc_id, score))
 
+    # Arama tarafı yeni skorları generation değişince yükler
+    publish_score_generation(cursor, "pagerank")
     conn.commit()
     cursor.close()
-    conn.close()
 
 def get_pagerank_scores(conn, doc_ids):
     cursor = conn.cursor()
@@ -57,7 +64,18 @@ def get_pagerank_scores(conn, doc_ids):
     return pagerank_scores
 
 if __name__ == "__main__":
-    conn = psycopg2.connect(**DB_CONFIG)
-    pagerank_scores = calculate_pagerank(conn)
-    save_pagerank_scores(conn, pagerank_scores)
+    parser = argparse.ArgumentParser(description="pages_cleaned.links → pagerank tablosu")
+    parser.add_argument("--alpha", type=float, default=PAGERANK_ALPHA, help="Damping factor")
+    parser.add_argument("--tol", type=float, default=PAGERANK_TOL)
+    parser.add_argument("--max-iter", type=int, default=PAGERANK_MAX_ITER)
+    parser.add_argument("--graph", default=os.getenv("LINK_GRAPH_PATH", GRAPH_FILE))
+    parser.add_argument("--rebuild-graph", action="store_true")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Önceki skorlardan başla (yeni ingest sonrası)")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        pagerank_scores = calculate_pagerank(conn, args.alpha, args.tol, args.max_iter,
+                                             args.graph, args.rebuild_graph, args.incremental)
+        save_pagerank_scores(conn, pagerank_scores)
     
\ No newline at end of file
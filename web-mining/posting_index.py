@@ -0,0 +1,461 @@
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from term_stats import STATS_CHECK_INTERVAL
+
+# Varsayılan index dizini; BM25_INDEX_DIR ile değiştirilebilir
+INDEX_DIR = "bm25-index"
+FORMAT_VERSION = 2
+
+# Index build sırasında bir seferde kodlanan posting sayısı
+ENCODE_BATCH = 1_000_000
+
+# Bir bloktaki posting sayısı; top-k sorgular sadece gereken blokları açar
+BLOCK_SIZE = 128
+
+# Üst sınırların (max_score, block_max) ve impact'lerin hesaplandığı BM25
+# parametreleri
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Impact index: posting başına BM25 katkısı terimin max_score'una göre bu
+# kadar bit ile nicemlenir
+IMPACT_BITS = 8
+IMPACT_LEVELS = (1 << IMPACT_BITS) - 1
+
+# Dosya düzeni (hepsi aynı dizinde):
+#   meta.json           N, toplam uzunluk, generation, k1/b, format sürümü
+#   doc_ids.npy         int64, iç doküman numarası → doc_id (artan)
+#   doc_lengths.npy     int32, iç doküman numarası → uzunluk
+#   terms.bin           sıralı terimlerin art arda UTF-8 baytları
+#   term_offsets.npy    uint64, terms.bin içinde i. terimin başlangıcı (T + 1)
+#   df.npy              uint32, terim başına doküman frekansı
+#   max_score.npy       float64, terimin bir dokümana katkısının üst sınırı
+#   postings.bin        terim başına (doc gap, freq) çiftleri, varint
+#   term_blocks.npy     uint64, i. terimin ilk bloğu (T + 1)
+#   block_offsets.npy   uint64, postings.bin içinde bloğun başlangıcı (B + 1)
+#   block_last_doc.npy  int64, bloğun son iç doküman numarası
+#   block_max.npy       float64, bloktaki en yüksek BM25 katkısı
+#   impacts.bin         (isteğe bağlı) uint8, posting sırasıyla nicemlenmiş
+#                       BM25 katkısı: katkı ≈ impact * max_score / 255
+#
+# Gap'ler bloklar arasında da devam eder: bir bloğun ilk gap'i, terimin
+# önceki bloğunun son dokümanına göredir.
+
+def encode_varints(values):
+    """
+    Negatif olmayan tam sayıları LEB128 varint olarak kodlar (vektörel)
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28, 35, 42, 49, 56, 63):
+        nbytes += values >= (np.uint64(1) << np.uint64(shift))
+    starts = np.concatenate(([0], np.cumsum(nbytes)[:-1]))
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max(initial=0))):
+        mask = nbytes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = (byte | more).astype(np.uint8)
+    return out, nbytes
+
+def decode_varints(data):
+    """
+    encode_varints'in tersi; data bir uint8 dizisi (memmap dilimi olabilir)
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+    if len(ends) == 0:
+        return np.empty(0, dtype=np.uint64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Her baytın kendi varint'i içindeki sırası
+    group = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    position = np.arange(len(data)) - starts[group]
+    parts = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.add.reduceat(parts, starts)
+
+def gather_ranges(data, starts, ends):
+    """
+    data'nın [starts[i], ends[i]) aralıklarını tek bir dizide birleştirir
+    """
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=data.dtype)
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(total) + np.repeat(starts - offsets, lengths)
+    return data[positions]
+
+def bm25_term_scores(freqs, doc_lengths, idf, avgdl, k1=BM25_K1, b=BM25_B):
+    """
+    Bir terimin posting'lerinin BM25 katkısı (vektörel)
+    """
+    return idf * (freqs * (k1 + 1)) / (freqs + k1 * (1 - b + b * doc_lengths / avgdl))
+
+def bm25_idf(N, df):
+    return np.log(1 + (N - df + 0.5) / (df + 0.5))
+
+class PostingIndexWriter:
+    """
+    (term, doc_id, freq) satırlarını (term, doc_id) sırasında alıp
+    sıkıştırılmış index dosyalarını yazar. Posting'ler ENCODE_BATCH'lik
+    parçalar halinde kodlanır, bellekte korpusun tamamı tutulmaz.
+    """
+    def __init__(self, index_dir, doc_ids, doc_lengths, total_length, generation=0, impacts=False):
+        self.index_dir = index_dir
+        self.tmp_dir = index_dir.rstrip("/") + ".tmp"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.int32)
+        np.save(self._path("doc_ids.npy"), self.doc_ids)
+        np.save(self._path("doc_lengths.npy"), self.doc_lengths)
+        self.N = len(self.doc_ids)
+        self.avgdl = total_length / self.N if self.N else 0.0
+        self.meta = {
+            "format": FORMAT_VERSION,
+            "doc_count": self.N,
+            "total_length": int(total_length),
+            "generation": int(generation),
+            "k1": BM25_K1,
+            "b": BM25_B,
+            "block_size": BLOCK_SIZE,
+            "impact_bits": IMPACT_BITS if impacts else None,
+        }
+
+        self.terms_file = open(self._path("terms.bin"), "wb")
+        self.postings_file = open(self._path("postings.bin"), "wb")
+        self.impacts_file = open(self._path("impacts.bin"), "wb") if impacts else None
+        self.term_offsets = [0]
+        self.dfs = []
+        self.max_scores = []
+        self.term_blocks = [0]
+        self.block_offsets = [0]
+        self.block_last_docs = []
+        self.block_maxes = []
+        self.pending_terms = []
+        self.pending_counts = []
+        self.pending_doc_ids = []
+        self.pending_freqs = []
+        self.last_term = None
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def add(self, term, doc_id, freq):
+        if term != self.last_term:
+            if len(self.pending_doc_ids) >= ENCODE_BATCH:
+                self._encode_pending()
+            self.last_term = term
+            self.pending_terms.append(term)
+            self.pending_counts.append(0)
+        self.pending_counts[-1] += 1
+        self.pending_doc_ids.append(doc_id)
+        self.pending_freqs.append(freq)
+
+    def _encode_pending(self):
+        if not self.pending_terms:
+            return
+        counts = np.asarray(self.pending_counts, dtype=np.int64)
+        doc_nums = np.searchsorted(self.doc_ids, np.asarray(self.pending_doc_ids, dtype=np.int64))
+        freqs = np.asarray(self.pending_freqs, dtype=np.int64)
+
+        # Her terimin ilk dokümanı kendi numarasıyla, sonrakiler farkla
+        term_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        gaps = np.diff(doc_nums, prepend=0)
+        gaps[term_starts] = doc_nums[term_starts]
+
+        pairs = np.empty(2 * len(gaps), dtype=np.int64)
+        pairs[0::2] = gaps
+        pairs[1::2] = freqs
+        data, nbytes = encode_varints(pairs)
+        self.postings_file.write(data.tobytes())
+
+        # Terimler BLOCK_SIZE'lık bloklara bölünür
+        block_counts = (counts + BLOCK_SIZE - 1) // BLOCK_SIZE
+        first_block = np.cumsum(block_counts) - block_counts
+        block_in_term = np.arange(int(block_counts.sum())) - np.repeat(first_block, block_counts)
+        block_starts = np.repeat(term_starts, block_counts) + block_in_term * BLOCK_SIZE
+        block_ends = np.minimum(block_starts + BLOCK_SIZE, np.repeat(term_starts + counts, block_counts))
+
+        # Bloğun postings.bin içindeki bayt sınırları
+        pair_bytes = nbytes[0::2] + nbytes[1::2]
+        byte_ends = np.cumsum(pair_bytes)
+        base = self.block_offsets[-1]
+        self.block_offsets.extend((base + byte_ends[block_ends - 1]).tolist())
+        self.block_last_docs.extend(doc_nums[block_ends - 1].tolist())
+
+        # Üst sınırlar: bloktaki ve terimdeki en yüksek BM25 katkısı
+        idf = bm25_idf(self.N, counts.astype(np.float64))
+        scores = bm25_term_scores(freqs, self.doc_lengths[doc_nums], np.repeat(idf, counts), self.avgdl)
+        block_max = np.maximum.reduceat(scores, block_starts)
+        self.block_maxes.extend(block_max.tolist())
+        term_max = np.maximum.reduceat(block_max, first_block)
+        self.max_scores.extend(term_max.tolist())
+        if self.impacts_file is not None:
+            # Eşleşen her doküman en az 1 alır ki eşleşme kaybolmasın
+            impacts = np.rint(scores / np.repeat(term_max, counts) * IMPACT_LEVELS)
+            self.impacts_file.write(np.clip(impacts, 1, IMPACT_LEVELS).astype(np.uint8).tobytes())
+        self.term_blocks.extend((self.term_blocks[-1] + np.cumsum(block_counts)).tolist())
+        self.dfs.extend(counts.tolist())
+
+        for term in self.pending_terms:
+            encoded = term.encode("utf-8")
+            self.terms_file.write(encoded)
+            self.term_offsets.append(self.term_offsets[-1] + len(encoded))
+
+        self.pending_terms = []
+        self.pending_counts = []
+        self.pending_doc_ids = []
+        self.pending_freqs = []
+
+    def close(self):
+        """
+        Dosyaları tamamlar ve dizini yerine taşır; index her zaman ya eski
+        ya da yeni haliyle görünür
+        """
+        self._encode_pending()
+        self.terms_file.close()
+        self.postings_file.close()
+        if self.impacts_file is not None:
+            self.impacts_file.close()
+        np.save(self._path("term_offsets.npy"), np.asarray(self.term_offsets, dtype=np.uint64))
+        np.save(self._path("df.npy"), np.asarray(self.dfs, dtype=np.uint32))
+        np.save(self._path("max_score.npy"), np.asarray(self.max_scores, dtype=np.float64))
+        np.save(self._path("term_blocks.npy"), np.asarray(self.term_blocks, dtype=np.uint64))
+        np.save(self._path("block_offsets.npy"), np.asarray(self.block_offsets, dtype=np.uint64))
+        np.save(self._path("block_last_doc.npy"), np.asarray(self.block_last_docs, dtype=np.int64))
+        np.save(self._path("block_max.npy"), np.asarray(self.block_maxes, dtype=np.float64))
+        self.meta["term_count"] = len(self.dfs)
+        with open(self._path("meta.json"), "w") as f:
+            json.dump(self.meta, f)
+
+        old_dir = self.index_dir.rstrip("/") + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.index_dir):
+            os.replace(self.index_dir, old_dir)
+        os.replace(self.tmp_dir, self.index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+class PostingIndex:
+    """
+    PostingIndexWriter'ın yazdığı index'i memory-map ile açar. Dosyalar
+    sayfa önbelleğinden okunur; aynı index'i açan bütün worker process'ler
+    tek bir kopyayı paylaşır, veritabanına gidilmez.
+    """
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+            # Her kurulumda meta.json yeni bir dosyadır; generation aynı
+            # kalsa da (ör. tokenizer değişikliği) version değişir
+            meta = os.fstat(f.fileno())
+            self.version = (meta.st_ino, meta.st_mtime_ns)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{index_dir}: unsupported index format {self.meta.get('format')}")
+
+        self.doc_ids = self._load("doc_ids.npy")
+        self.doc_lengths = self._load("doc_lengths.npy")
+        self.term_offsets = self._load("term_offsets.npy")
+        self.dfs = self._load("df.npy")
+        self.max_scores = self._load("max_score.npy")
+        self.term_blocks = self._load("term_blocks.npy").astype(np.int64)
+        self.block_offsets = self._load("block_offsets.npy").astype(np.int64)
+        self.block_last_doc = self._load("block_last_doc.npy")
+        self.block_max = self._load("block_max.npy")
+        self.terms = self._memmap("terms.bin")
+        self.postings_data = self._memmap("postings.bin")
+
+        # Terimin posting'lerinin (ve impact'lerinin) global sırası
+        self.posting_starts = np.zeros(len(self.dfs) + 1, dtype=np.int64)
+        np.cumsum(self.dfs, out=self.posting_starts[1:])
+        self.impacts = self._memmap("impacts.bin") if self.meta.get("impact_bits") else None
+
+        self.N = self.meta["doc_count"]
+        self.avgdl = self.meta["total_length"] / self.N if self.N else 0.0
+        self.generation = self.meta["generation"]
+        self.k1 = self.meta["k1"]
+        self.b = self.meta["b"]
+
+    def _load(self, name):
+        return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+    def _memmap(self, name):
+        path = os.path.join(self.index_dir, name)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
+
+    def __len__(self):
+        return len(self.dfs)
+
+    def _term_at(self, i):
+        return self.terms[self.term_offsets[i]:self.term_offsets[i + 1]].tobytes()
+
+    def lookup(self, term):
+        """
+        Terimin sözlükteki sırası ya da None (ikili arama)
+        """
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.dfs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.dfs) and self._term_at(lo) == key:
+            return lo
+        return None
+
+    def df(self, term):
+        i = self.lookup(term)
+        return 0 if i is None else int(self.dfs[i])
+
+    def postings(self, term):
+        """
+        (iç doküman numaraları, frekanslar) ya da terim yoksa None
+        """
+        i = self.lookup(term)
+        if i is None:
+            return None
+        return self.term_postings(i)
+
+    def term_postings(self, i):
+        start = self.block_offsets[self.term_blocks[i]]
+        end = self.block_offsets[self.term_blocks[i + 1]]
+        values = decode_varints(self.postings_data[start:end])
+        doc_nums = np.cumsum(values[0::2]).astype(np.int64)
+        freqs = values[1::2].astype(np.float64)
+        return doc_nums, freqs
+
+    def term_impacts(self, i):
+        """
+        i. terimin posting'lerinin BM25 katkıları, impacts.bin'den
+        (term_postings ile aynı sıra)
+        """
+        impacts = self.impacts[self.posting_starts[i]:self.posting_starts[i + 1]]
+        return impacts * (float(self.max_scores[i]) / IMPACT_LEVELS)
+
+    def block_impacts(self, i, blocks):
+        """
+        i. terimin sadece verilen bloklarındaki posting'lerin BM25
+        katkıları, impacts.bin'den (block_postings ile aynı sıra)
+        """
+        block_size = self.meta["block_size"]
+        starts = self.posting_starts[i] + np.asarray(blocks, dtype=np.int64) * block_size
+        ends = np.minimum(starts + block_size, self.posting_starts[i + 1])
+        impacts = gather_ranges(self.impacts, starts, ends)
+        return impacts * (float(self.max_scores[i]) / IMPACT_LEVELS)
+
+    def block_postings(self, i, blocks):
+        """
+        i. terimin sadece verilen bloklarını (terim içindeki sıra, artan)
+        açar: (iç doküman numaraları, frekanslar)
+        """
+        first = self.term_blocks[i]
+        blocks = first + np.asarray(blocks, dtype=np.int64)
+        data = gather_ranges(self.postings_data, self.block_offsets[blocks], self.block_offsets[blocks + 1])
+        values = decode_varints(data)
+        gaps = values[0::2].astype(np.int64)
+        freqs = values[1::2].astype(np.float64)
+
+        # Her bloğun ilk gap'i önceki bloğun son dokümanına göredir
+        ends = np.flatnonzero(data < 0x80)
+        byte_bounds = self.block_offsets[blocks + 1] - self.block_offsets[blocks]
+        pairs_per_block = np.diff(np.searchsorted(ends, np.cumsum(byte_bounds) - 1, side="right"), prepend=0) // 2
+        block_first = np.cumsum(pairs_per_block) - pairs_per_block
+        bases = np.where(blocks > first, self.block_last_doc[np.maximum(blocks - 1, 0)], 0)
+        gaps[block_first] += bases
+        # Bloklar arasındaki farkı yok etmek için her bloğun cumsum'u ayrı
+        doc_nums = np.cumsum(gaps)
+        offsets = np.repeat(doc_nums[block_first] - gaps[block_first], pairs_per_block)
+        return doc_nums - offsets, freqs
+
+class IndexReloader:
+    """
+    Process içinde açık tutulan PostingIndex. PostingIndexWriter dizini
+    atomik olarak değiştirdiğinde meta.json yeni bir dosya olur; inode /
+    mtime en fazla check_interval'da bir kontrol edilir ve değişmişse index
+    yeniden açılır. Eski index'in mmap'leri onu kullanan istekler bitince
+    serbest kalır.
+    """
+    def __init__(self, index_dir=INDEX_DIR, check_interval=STATS_CHECK_INTERVAL):
+        self.index_dir = index_dir
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.index = None
+        self.checked_at = 0.0
+
+    def _read_version(self):
+        try:
+            meta = os.stat(os.path.join(self.index_dir, "meta.json"))
+        except FileNotFoundError:
+            return None
+        return meta.st_ino, meta.st_mtime_ns
+
+    def get(self):
+        """
+        Güncel index ya da (hiç kurulmadıysa) None
+        """
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return self.index
+        with self.lock:
+            if now - self.checked_at >= self.check_interval:
+                version = self._read_version()
+                # Değiştirme sırasında dizin bir an yoktur; o zaman eski
+                # index kullanılmaya devam edilir
+                if version is not None and (self.index is None or version != self.index.version):
+                    self.index = PostingIndex(self.index_dir)
+                self.checked_at = now
+        return self.index
+
+def build_posting_index(conn, index_dir=INDEX_DIR, itersize=100_000, impacts=False):
+    """
+    doc_lengths ve inverted_index tablolarından index dosyalarını üretir.
+    Posting'ler server-side cursor ile (term, doc_id) sırasında okunur.
+    impacts=True ise posting başına nicemlenmiş BM25 katkıları da yazılır.
+    """
+    from change_tracking import ensure_tracking_schema
+
+    # Eski veritabanlarında corpus_stats henüz yok
+    ensure_tracking_schema(conn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT doc_id, length FROM doc_lengths ORDER BY doc_id")
+        rows = cur.fetchall()
+        cur.execute("SELECT COALESCE(MAX(generation), 0) FROM corpus_stats")
+        generation = cur.fetchone()[0]
+    doc_ids = [doc_id for doc_id, _ in rows]
+    doc_lengths = [length for _, length in rows]
+    writer = PostingIndexWriter(index_dir, doc_ids, doc_lengths, sum(doc_lengths), generation, impacts)
+    del rows
+
+    postings = 0
+    with conn.cursor(name="posting_index_export") as cur:
+        cur.itersize = itersize
+        cur.execute("SELECT term, doc_id, freq FROM inverted_index ORDER BY term COLLATE \"C\", doc_id")
+        for term, doc_id, freq in cur:
+            writer.add(term, doc_id, freq)
+            postings += 1
+    conn.commit()
+    writer.close()
+    return len(writer.dfs), postings
+
+if __name__ == "__main__":
+    import argparse
+    from db_pool import connection
+
+    parser = argparse.ArgumentParser(description="inverted_index → memory-mapped BM25 index")
+    parser.add_argument("--index-dir", default=os.getenv("BM25_INDEX_DIR", INDEX_DIR))
+    parser.add_argument("--impacts", action="store_true",
+                        help=f"Posting başına {IMPACT_BITS} bitlik BM25 katkısı da yaz (k1={BM25_K1}, b={BM25_B})")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        terms, postings = build_posting_index(conn, args.index_dir, impacts=args.impacts)
+    print(f"{args.index_dir}: {terms} terms, {postings} postings")
@@ -1,28 +1,20 @@
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
 import html.entities  # html modülünü doğru şekilde import ediyoruz
-import psycopg2
+import os
+import io
+import argparse
+import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
-from config import DB_CONFIG
-from text_preprocessing import preprocess_text
+from db_pool import get_pool
+from text_preprocessing import preprocess_texts
+from html_extraction import extract_page_content
+from change_tracking import ensure_tracking_schema
 
 def extract_text_and_links(html_content, base_url):
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # Metin çıkarımı
-    for tag in soup(["script", "style", "noscript"]):
-        tag.extract()
-
-    text = soup.get_text(separator=' ', strip=True)
-
-    # Hyperlink çıkarımı
-    links = []
-    for a_tag in soup.find_all("a", href=True):
-        href = urljoin(base_url, a_tag['href'])  # relative → absolute
-        if urlparse(href).scheme in ['http', 'https']:
-            links.append(href)
-
-    return text, links
+    # Başlık, metin ve linkler tek geçişte çıkarılır (bkz. html_extraction)
+    page = extract_page_content(html_content, base_url)
+    return page.text, page.links
 
 def safe_encode_decode(text):
     """
@@ -44,52 +36,131 @@ def safe_encode_decode(text):
         print(f"Metin dönüştürme hatası: {e}")
         return ""
 
-def process_in_chunks(batch_size=1000):
+def to_pg_array(values):
+    """
+    Python listesini PostgreSQL text[] literal'ine çevirir (COPY için)
+    """
+    items = []
+    for value in values:
+        value = value.replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'"{value}"')
+    return "{" + ",".join(items) + "}"
+
+def clean_batch(rows):
+    """
+    Process havuzunda çalışır: (id, url, html) satırlarını
+    (id, url, text, links, tokens) satırlarına çevirir
+    """
+    extracted = []
+    for id, url, raw_html in rows:
+        html_content = safe_encode_decode(raw_html)
+        text, links = extract_text_and_links(html_content, url)
+        extracted.append((id, url, text, links))
+
+    token_lists = preprocess_texts([text for _, _, text, _ in extracted])
+    return [
+        (id, url, text, links, tokens)
+        for (id, url, text, links), tokens in zip(extracted, token_lists)
+    ]
+
+# Henüz temizlenmemiş ya da temizlendikten sonra tekrar yazılmış sayfalar
+CHANGED_PAGES_FILTER = """
+    NOT EXISTS (
+        SELECT 1 FROM pages_cleaned c
+        WHERE c.id = p.id AND c.updated_at >= p.created_at
+    )
+"""
+
+def read_page_batches(cursor, batch_size, last_id=0, changed_only=False):
+    """
+    pages tablosunu id sırasıyla (keyset) parça parça okur. OFFSET'in
+    aksine her sorgu önceki satırları tekrar taramaz. `changed_only` ile
+    sadece yeni ya da değişmiş sayfalar okunur.
+    """
+    changed_filter = f"AND {CHANGED_PAGES_FILTER}" if changed_only else ""
+    while True:
+        cursor.execute(
+            f"SELECT p.id, p.url, p.html FROM pages p WHERE p.id > %s {changed_filter} ORDER BY p.id LIMIT %s",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1][0]
+
+def save_cleaned_rows(conn, rows):
+    """
+    Satırları COPY ile geçici bir staging tablosuna yükler, oradan tek
+    sorguyla pages_cleaned'e merge eder ve commit eder
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for id, url, text, links, tokens in rows:
+        writer.writerow([id, url, text, to_pg_array(links), to_pg_array(tokens)])
+    output.seek(0)
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS pages_cleaned_staging
+            (LIKE pages_cleaned INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;
+        """)
+        # csv.writer boş metni tırnaksız yazar; COPY bunu NULL okumasın
+        cur.copy_expert(
+            "COPY pages_cleaned_staging (id, url, text, links, tokens) FROM STDIN "
+            "WITH (FORMAT csv, FORCE_NOT_NULL (text))",
+            output
+        )
+        cur.execute("""
+            INSERT INTO pages_cleaned (id, url, text, links, tokens)
+            SELECT id, url, text, links, tokens FROM pages_cleaned_staging
+            ON CONFLICT (id) DO UPDATE
+            SET text = EXCLUDED.text, links = EXCLUDED.links, tokens = EXCLUDED.tokens,
+                updated_at = CURRENT_TIMESTAMP;
+        """)
+    conn.commit()
+
+def process_in_chunks(batch_size=1000, workers=None, max_in_flight=None, incremental=False):
+    """
+    pages tablosunu keyset sırasıyla okur, batch'leri bir process
+    havuzunda temizler ve sonuçları COPY + merge ile pages_cleaned'e yazar.
+    Okuma, temizleme ve yazma aynı anda ilerler; en fazla `max_in_flight`
+    batch havuzda bekler. `incremental` ile sadece pages_cleaned'de
+    karşılığı olmayan ya da ondan sonra eklenmiş sayfalar işlenir.
+    """
+    workers = workers or os.cpu_count()
+    max_in_flight = max_in_flight or workers * 2
+
     # Veritabanı bağlantısı
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = get_pool().getconn()
     cursor = conn.cursor()
     
     try:
+        ensure_tracking_schema(conn)
         # Toplam kayıt sayısını al
-        cursor.execute("SELECT COUNT(*) FROM pages")
+        if incremental:
+            cursor.execute(f"SELECT COUNT(*) FROM pages p WHERE {CHANGED_PAGES_FILTER}")
+        else:
+            cursor.execute("SELECT COUNT(*) FROM pages")
         total_records = cursor.fetchone()[0]
         
-        # Offset ile parça parça veri çek
-        offset = 0
-        with tqdm(total=total_records, desc="İşlenen Kayıtlar") as pbar:
-            while True:
-                # Belirli sayıda kayıt çek
-                cursor.execute(f"SELECT id, url, title, html FROM pages LIMIT {batch_size} OFFSET {offset}")
-                rows = cursor.fetchall()
-                
-                if not rows:
-                    break
-                    
-                # Her bir kayıt için işlem yap
-                for row in rows:
-                    id = row[0]
-                    url = row[1]
-                    title = row[2]
-                    html = safe_encode_decode(row[3])
-                    text, links = extract_text_and_links(html, url)
-                    tokens = preprocess_text(text)
-                    cursor.execute("""
-                        INSERT INTO pages_cleaned (id, url, text, links, tokens)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (id) DO UPDATE
-                        SET text = EXCLUDED.text, links = EXCLUDED.links, tokens = EXCLUDED.tokens;
-                    """, (id, url, text, links, tokens))
-
-                    pass
-                
+        with tqdm(total=total_records, desc="İşlenen Kayıtlar") as pbar, \
+                ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+
+            def save_oldest():
+                cleaned = in_flight.popleft().result()
+                save_cleaned_rows(conn, cleaned)
                 # İlerleme çubuğunu güncelle
-                pbar.update(len(rows))
-                
-                # Offset'i güncelle
-                offset += batch_size
-                
-                # Her batch'te commit yap
-                conn.commit()
+                pbar.update(len(cleaned))
+
+            for rows in read_page_batches(cursor, batch_size, changed_only=incremental):
+                in_flight.append(pool.submit(clean_batch, rows))
+                if len(in_flight) >= max_in_flight:
+                    save_oldest()
+
+            while in_flight:
+                save_oldest()
         
         print(f"Toplam {total_records} kayıt işlendi.")
         
@@ -98,7 +169,13 @@ def process_in_chunks(batch_size=1000):
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
 
 if __name__ == "__main__":
-    process_in_chunks(batch_size=1000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="pages → pages_cleaned ön işleme")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Sadece yeni ya da değişmiş sayfaları işle")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    process_in_chunks(batch_size=1000, workers=args.workers, incremental=args.incremental)
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Önbelleğin toplam boyutu ve bir girdinin ömrü
+RESULT_CACHE_BYTES = int(float(os.getenv("RESULT_CACHE_MB", "64")) * 1024 * 1024)
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+
+# Anahtar, dizi başlıkları vs. için girdi başına sabit pay (bayt)
+ENTRY_OVERHEAD = 512
+
+def cache_key(query_tokens, *params):
+    """
+    Token sırası BM25 skorunu değiştirmez; tekrarlar değiştirdiği için
+    korunur. Float parametreler yuvarlanır ki 0.3 ile 0.30000000000000004
+    aynı girdiye düşsün.
+    """
+    params = tuple(round(p, 6) if isinstance(p, float) else p for p in params)
+    return (tuple(sorted(query_tokens)),) + params
+
+class RankedResults:
+    """
+    Bir sorgunun sıralı sonuçları: doc_id ve skor dizileri.
+
+    complete False ise sadece ilk len(self) sonuç hesaplanmıştır (top-k);
+    total bu durumda eşleşen doküman sayısının tahmini olabilir
+    (total_exact False ise bir alt sınır).
+    """
+    __slots__ = ("doc_ids", "scores", "total", "total_exact", "complete", "generation", "created")
+
+    def __init__(self, results, total, complete, generation, total_exact=True):
+        self.doc_ids = np.fromiter((doc_id for doc_id, _ in results), dtype=np.int64, count=len(results))
+        self.scores = np.fromiter((score for _, score in results), dtype=np.float64, count=len(results))
+        self.total = total
+        self.total_exact = total_exact
+        self.complete = complete
+        self.generation = generation
+        self.created = time.monotonic()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    @property
+    def nbytes(self):
+        return self.doc_ids.nbytes + self.scores.nbytes + ENTRY_OVERHEAD
+
+    def covers(self, end):
+        """
+        [0, end) aralığındaki sonuçlar yeniden hesaplamadan verilebilir mi
+        """
+        return self.complete or end <= len(self)
+
+    def page(self, start, end):
+        return list(zip(self.doc_ids[start:end].tolist(), self.scores[start:end].tolist()))
+
+class ResultCache:
+    """
+    Sorgu → RankedResults için LRU + TTL önbellek.
+
+    Boyut, tutulan sonuç dizilerinin toplam baytıyla sınırlıdır; sınır
+    aşılınca en uzun süredir kullanılmayan girdiler atılır. Her girdi
+    hesaplandığı generation'ı taşır; get() farklı bir generation ile
+    çağrılınca girdi geçersizdir. Generation'ı uç nokta belirler (/search
+    sadece BM25 index'ine, /advanced-search PageRank/HITS skorlarına da
+    bağlıdır), böylece bir sinyalin değişmesi ona bağlı olmayan girdileri
+    silmez.
+    """
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES, ttl=RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def get(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.generation != generation:
+                self.stats["invalidations"] += 1
+                del self.entries[key]
+                self.nbytes -= entry.nbytes
+                entry = None
+            elif entry is not None and time.monotonic() - entry.created > self.ttl:
+                del self.entries[key]
+                self.nbytes -= entry.nbytes
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key, entry):
+        size = entry.nbytes
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            while self.entries and self.nbytes + size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.stats["evictions"] += 1
+            self.entries[key] = entry
+            self.nbytes += size
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+
+    def metrics(self):
+        with self.lock:
+            metrics = dict(self.stats)
+            metrics.update({
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            })
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        return metrics
+
+_result_cache = ResultCache()
+
+def get_result_cache():
+    return _result_cache
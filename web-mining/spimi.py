@@ -0,0 +1,153 @@
+import heapq
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+# Bellekteki posting sözlüğünün kaba boyut tahmini (CPython, 64-bit):
+# bir posting = (doc_id, freq) tuple'ı + iki int + liste slotu,
+# yeni bir terim = dict girdisi + str + boş liste
+POSTING_BYTES = 120
+TERM_BYTES = 200
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+def copy_escape(value):
+    """
+    PostgreSQL COPY text formatı için kaçış
+    """
+    return (value.replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def _read_run(path):
+    with open(path, "r", encoding="utf-8", newline="\n") as f:
+        for line in f:
+            term, doc_id, _ = line.split("\t")
+            yield term, int(doc_id), line
+
+class LineStream:
+    """
+    Satır üreticisini copy_expert'in okuyabileceği dosya benzeri bir
+    nesneye çevirir; veri COPY'ye akarken bellekte sadece bir tampon durur.
+    """
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.pending = ""
+
+    def read(self, size=-1):
+        chunks = [self.pending]
+        length = len(self.pending)
+        for line in self.lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(chunks)
+        if 0 <= size < len(data):
+            data, self.pending = data[:size], data[size:]
+        else:
+            self.pending = ""
+        return data
+
+class SpimiIndexer:
+    """
+    Single-pass in-memory indexing (SPIMI).
+
+    Posting'ler bellekte terim → [(doc_id, freq)] sözlüğünde toplanır;
+    tahmini boyut memory_budget'a ulaşınca sözlük terime göre sıralanıp
+    geçici bir run dosyasına yazılır ve boşaltılır. merged_postings() run'ları
+    k-way merge ile (term, doc_id) sırasında birleştirir; bellekte her
+    run'dan yalnızca bir satır tutulur. Böylece en yüksek bellek kullanımı
+    korpus boyutundan bağımsız olarak bütçe civarında kalır.
+
+    Dokümanlar artan doc_id sırasıyla eklenmelidir.
+    """
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, tmp_dir=None):
+        self.memory_budget = memory_budget
+        self.tmp_dir = tempfile.mkdtemp(prefix="spimi-", dir=tmp_dir)
+        self.runs = []
+        self.postings = {}
+        self.estimated_bytes = 0
+        self.doc_count = 0
+        self.total_length = 0
+        self.posting_count = 0
+        # Doküman uzunlukları da bellekte değil, diskte birikir
+        self.lengths_path = os.path.join(self.tmp_dir, "doc_lengths.tsv")
+        self.lengths_file = open(self.lengths_path, "w", encoding="utf-8", newline="\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_document(self, doc_id, tokens):
+        freq = Counter(tokens or [])
+        length = sum(freq.values())
+        self.lengths_file.write(f"{doc_id}\t{length}\n")
+        self.doc_count += 1
+        self.total_length += length
+        self.posting_count += len(freq)
+
+        postings = self.postings
+        added = len(freq) * POSTING_BYTES
+        for term, count in freq.items():
+            term_postings = postings.get(term)
+            if term_postings is None:
+                postings[term] = [(doc_id, count)]
+                added += TERM_BYTES + len(term)
+            else:
+                term_postings.append((doc_id, count))
+
+        self.estimated_bytes += added
+        if self.estimated_bytes >= self.memory_budget:
+            self.flush_run()
+
+    def _sorted_postings(self):
+        # Run'lar kaçışlı terime göre sıralanır ki dosyadan okunan satırlarla
+        # aynı sırayı versin
+        for term, term_postings in sorted(
+            (copy_escape(term), term_postings)
+            for term, term_postings in self.postings.items()
+        ):
+            for doc_id, count in term_postings:
+                yield term, doc_id, f"{term}\t{doc_id}\t{count}\n"
+
+    def flush_run(self):
+        """
+        Bellekteki posting'leri sıralı bir run dosyasına yazar
+        """
+        if not self.postings:
+            return
+        path = os.path.join(self.tmp_dir, f"run-{len(self.runs):05d}.tsv")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(line for _, _, line in self._sorted_postings())
+        self.runs.append(path)
+        self.postings = {}
+        self.estimated_bytes = 0
+
+    def merged_postings(self):
+        """
+        Bütün posting'leri "term\\tdoc_id\\tfreq\\n" satırları olarak
+        (term, doc_id) sırasında üretir. Son run diske yazılmadan
+        bellekten birleştirilir.
+        """
+        sources = [_read_run(path) for path in self.runs]
+        if self.postings:
+            sources.append(self._sorted_postings())
+        # Bir doküman tek bir run'da olduğundan (term, doc_id) benzersizdir,
+        # satırın kendisi hiç karşılaştırılmaz
+        for _, _, line in heapq.merge(*sources):
+            yield line
+
+    def open_doc_lengths(self):
+        """
+        "doc_id\\tlength" satırlarını okumak için dosya
+        """
+        self.lengths_file.flush()
+        return open(self.lengths_path, "r", encoding="utf-8", newline="\n")
+
+    def close(self):
+        self.lengths_file.close()
+        self.postings = {}
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
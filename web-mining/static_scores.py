@@ -0,0 +1,154 @@
+import threading
+import time
+import numpy as np
+from psycopg2 import errors
+from fusion import minmax_normalize
+from term_stats import STATS_CHECK_INTERVAL
+
+# Sinyal adı → (tablo, skor kolonu)
+SIGNALS = {
+    "pagerank": ("pagerank", "score"),
+    "hits": ("hits", "authority_score"),
+}
+
+def ensure_score_schema(conn):
+    """
+    score_generations: pagerank.py / hits.py her skor yazışında ilgili
+    sinyalin generation'ını artırır; arama tarafı skorları bu değişince
+    yeniden yükler.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS score_generations (
+                signal text PRIMARY KEY,
+                generation bigint NOT NULL DEFAULT 0,
+                updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+    conn.commit()
+
+def publish_score_generation(cur, signal):
+    """
+    Skorlarla aynı transaction'da çağrılır; commit çağıran taraftadır
+    """
+    cur.execute("""
+        INSERT INTO score_generations (signal, generation)
+        VALUES (%s, 1)
+        ON CONFLICT (signal) DO UPDATE
+        SET generation = score_generations.generation + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    """, (signal,))
+
+class StaticScore:
+    """
+    Bir sinyalin skorları, doc_id ile indekslenen yoğun dizi. Skoru
+    olmayan dokümanlar NaN'dır.
+    """
+    def __init__(self, doc_ids, scores):
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        size = int(doc_ids.max()) + 1 if len(doc_ids) else 0
+        self.values = np.full(size, np.nan)
+        self.values[doc_ids] = scores
+        self.count = len(doc_ids)
+        self.min = float(scores.min()) if len(scores) else 0.0
+        self.max = float(scores.max()) if len(scores) else 0.0
+
+    def gather(self, doc_ids):
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        result = np.full(len(doc_ids), np.nan)
+        in_range = doc_ids < len(self.values)
+        result[in_range] = self.values[doc_ids[in_range]]
+        return result
+
+    def normalized(self, doc_ids, local=True):
+        """
+        Min-max normalize edilmiş skorlar; skoru olmayanlar 0.
+
+        local=True, bm25_implementation.normalize gibi sadece verilen
+        dokümanların min/max'ını kullanır; False ise bütün sinyalin
+        min/max'ı kullanılır.
+        """
+        values = self.gather(doc_ids)
+        if local:
+            return minmax_normalize(values)
+        result = np.zeros(len(values))
+        present = ~np.isnan(values)
+        if self.max > self.min:
+            result[present] = (values[present] - self.min) / (self.max - self.min)
+        return result
+
+    def to_dict(self, doc_ids):
+        """
+        Verilen dokümanlardan skoru olanlar için doc_id → skor
+        """
+        values = self.gather(doc_ids)
+        present = ~np.isnan(values)
+        return dict(zip(np.asarray(doc_ids)[present].tolist(), values[present].tolist()))
+
+class StaticScoreStore:
+    """
+    PageRank ve HITS authority skorlarının process içi kopyası.
+
+    Skorlar sorgudan bağımsızdır ve sadece pagerank.py / hits.py yeniden
+    çalıştırıldığında değişir. Bu yüzden tablolar bir kez yoğun dizilere
+    yüklenir; score_generations en fazla check_interval'da bir kontrol
+    edilir ve generation'ı değişen sinyal yeniden yüklenir. Hibrit
+    sıralama böylece veritabanına gitmeden dizi indekslemesiyle yapılır.
+    """
+    def __init__(self, check_interval=STATS_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.signals = {}
+        self.generations = {}
+        self.checked_at = 0.0
+
+    @property
+    def generation(self):
+        return tuple(self.generations.get(name) for name in SIGNALS)
+
+    def is_fresh(self):
+        """
+        True ise refresh() veritabanına gitmeden döner
+        """
+        return len(self.signals) == len(SIGNALS) and time.monotonic() - self.checked_at < self.check_interval
+
+    def _read_generations(self, cursor):
+        try:
+            cursor.execute("SELECT signal, generation FROM score_generations;")
+            return dict(cursor.fetchall())
+        except errors.UndefinedTable:
+            # Skorlar bu özellikten önce yazılmış: ilk yüklemeden sonra
+            # ancak yeni bir skor yazımıyla değişirler
+            cursor.connection.rollback()
+            return {}
+
+    def _load(self, cursor, name):
+        table, column = SIGNALS[name]
+        cursor.execute(f"SELECT doc_id, {column} FROM {table};")
+        rows = cursor.fetchall()
+        return StaticScore([row[0] for row in rows], [row[1] for row in rows])
+
+    def refresh(self, cursor, force=False):
+        if not force and self.is_fresh():
+            return
+        now = time.monotonic()
+        generations = self._read_generations(cursor)
+        loaded = {}
+        for name in SIGNALS:
+            generation = generations.get(name, 0)
+            if force or name not in self.signals or self.generations.get(name) != generation:
+                loaded[name] = (self._load(cursor, name), generation)
+        with self.lock:
+            for name, (scores, generation) in loaded.items():
+                self.signals[name] = scores
+                self.generations[name] = generation
+            self.checked_at = now
+
+    def __getitem__(self, name):
+        return self.signals[name]
+
+_static_scores = StaticScoreStore()
+
+def get_static_scores():
+    return _static_scores
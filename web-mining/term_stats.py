@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+from psycopg2 import errors
+from change_tracking import get_corpus_stats
+
+# corpus_stats.generation en fazla bu aralıkla kontrol edilir (saniye)
+STATS_CHECK_INTERVAL = 5.0
+
+# Önbellekteki terim sayısı üst sınırı; aşılınca önbellek boşaltılır
+TERM_CACHE_SIZE = 100_000
+
+def bm25_idf(N, df):
+    return math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+class TermStats:
+    """
+    BM25'in sorgudan bağımsız istatistikleri için process içi önbellek:
+    N, avgdl ve terim başına (df, idf).
+
+    N ve avgdl corpus_stats'tan, df'ler term_stats tablosundan okunur ve
+    index generation'ı değişene kadar tekrar sorulmaz. Böylece bir sorgu
+    COUNT/AVG taramaları yerine en fazla bir generation kontrolü ve daha
+    önce görülmemiş terimler için tek bir df sorgusu yapar.
+
+    change_tracking.ensure_tracking_schema'dan önceki veritabanlarında
+    (corpus_stats yok) istatistikler eski COUNT/SUM sorgularıyla
+    doc_lengths ve inverted_index'ten hesaplanır; generation bu durumda
+    (N, toplam uzunluk) olur.
+    """
+    def __init__(self, check_interval=STATS_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.generation = None
+        self.N = 0
+        self.avgdl = 0.0
+        self.terms = {}
+        self.aggregate = False
+        self.checked_at = 0.0
+
+    def is_fresh(self):
+        """
+        True ise refresh() veritabanına gitmeden döner
+        """
+        return self.generation is not None and time.monotonic() - self.checked_at < self.check_interval
+
+    def refresh(self, cursor, force=False):
+        """
+        Generation değiştiyse N/avgdl'yi yeniden okur ve terim önbelleğini
+        boşaltır. İstatistik yoksa False döner.
+        """
+        if not force and self.is_fresh():
+            return True
+
+        now = time.monotonic()
+        aggregate = False
+        try:
+            stats = get_corpus_stats(cursor)
+        except errors.UndefinedTable:
+            cursor.connection.rollback()
+            stats = self._aggregate_stats(cursor)
+            aggregate = True
+        with self.lock:
+            self.checked_at = now
+            self.aggregate = aggregate
+            if stats is None:
+                self.generation = None
+                self.terms = {}
+                return False
+            N, avgdl, generation = stats
+            if generation != self.generation:
+                self.N, self.avgdl, self.generation = N, avgdl, generation
+                self.terms = {}
+        return True
+
+    def _aggregate_stats(self, cursor):
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM doc_lengths;")
+        doc_count, total_length = cursor.fetchone()
+        if not doc_count:
+            return None
+        return doc_count, total_length / doc_count, (doc_count, total_length)
+
+    def lookup(self, cursor, terms):
+        """
+        term → (df, idf); index'te olmayan terimler sonuçta yer almaz
+        """
+        cache = self.terms
+        result = {}
+        missing = []
+        for term in set(terms):
+            if term not in cache:
+                missing.append(term)
+            elif cache[term] is not None:
+                result[term] = cache[term]
+
+        if missing:
+            if self.aggregate:
+                cursor.execute(
+                    "SELECT term, COUNT(*) FROM inverted_index WHERE term = ANY(%s) GROUP BY term", (missing,)
+                )
+            else:
+                cursor.execute("SELECT term, df FROM term_stats WHERE term = ANY(%s) AND df > 0", (missing,))
+            found = dict(cursor.fetchall())
+            entries = {
+                term: (found[term], bm25_idf(self.N, found[term])) if term in found else None
+                for term in missing
+            }
+            with self.lock:
+                if len(cache) + len(entries) > TERM_CACHE_SIZE:
+                    cache.clear()
+                cache.update(entries)
+            result.update((term, entry) for term, entry in entries.items() if entry is not None)
+        return result
+
+_term_stats = TermStats()
+
+def get_term_stats():
+    return _term_stats
@@ -0,0 +1,46 @@
+import pytest
+from turkish_tokenizer import stem, tokenize
+
+# Sonu ek gibi görünen yalın kökler: kök tek heceli kalır, ünlü uyumu
+# tutmaz ya da ünsüz öbeği yumuşak ünsüzle biter
+@pytest.mark.parametrize("word", [
+    "dünya", "kanun", "yazı", "altın", "kadın", "bilgi", "yangın", "salgın",
+    "gazete", "ordu", "beden",
+])
+def test_roots_are_not_stripped(word):
+    assert stem(word) == word
+
+@pytest.mark.parametrize("word, root", [
+    ("yangını", "yangın"),
+    ("yangında", "yangın"),
+    ("yangınların", "yangın"),
+    ("salgını", "salgın"),
+    ("gazeteler", "gazete"),
+    ("gazetede", "gazete"),
+    ("dünyada", "dünya"),
+    ("kanunları", "kanun"),
+    ("okulu", "okul"),
+    ("okullarda", "okul"),
+    ("evleri", "ev"),
+    ("arabanın", "araba"),
+    ("ankaraya", "ankara"),
+    ("ormanlarda", "orman"),
+    ("kitapta", "kitap"),
+])
+def test_inflections_reduce_to_root(word, root):
+    assert stem(word) == root
+
+@pytest.mark.parametrize("word, root", [
+    ("kitabı", "kitap"),
+    ("ağacı", "ağaç"),
+    ("kanadı", "kanat"),
+    ("bakanlığı", "bakanlık"),
+])
+def test_softened_consonant_is_restored(word, root):
+    assert stem(word) == root
+
+def test_inflections_share_a_stem():
+    assert stem("türkiye") == stem("türkiyede") == stem("türkiyenin")
+
+def test_tokenize_folds_turkish_case():
+    assert tokenize("İstanbul ORMAN YANGINI") == ["istanbul", "orman", "yangın"]
@@ -1,23 +1,38 @@
-import nltk
-from nltk.corpus import stopwords
-import string
+import os
+from functools import lru_cache
+from turkish_tokenizer import tokenize, tokenize_many
 
-# NLTK gerekli verileri indir
-nltk.download('punkt')
-nltk.download('stopwords')
+# NLTK'nin Türkçe stop words listesi (corpora/stopwords/turkish) repoda
+# tutuluyor; import sırasında indirme ya da ağ erişimi gerekmez
+STOP_WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "turkish_stopwords.txt")
 
-# Stop words ve noktalama işaretlerini tanımla
-stop_words = set(stopwords.words('turkish'))
-punctuations = set(string.punctuation)
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """
+    Türkçe stop words kümesi. Dosya ilk kullanımda bir kez okunur.
+
+    Returns:
+        frozenset: Stop words
+    """
+    with open(STOP_WORDS_FILE, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+def __getattr__(name):
+    # Eski `from text_preprocessing import stop_words` kullanımı için
+    if name == "stop_words":
+        return get_stop_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def preprocess_text(text):
     """
-    Metni ön işleme adımlarından geçirir:
-    - Küçük harfe çevirir
+    Metni ön işleme adımlarından geçirir (bkz. turkish_tokenizer):
+    - Türkçe kurallarıyla küçük harfe çevirir (I → ı, İ → i)
+    - Noktalama ve rakamlarda böler, sadece harf dizilerini tutar
     - Stop words'leri kaldırır
-    - Noktalama işaretlerini kaldırır
-    - Sadece alfabetik karakterleri tutar
     - Tek karakterli kelimeleri filtreler
+    - Kelimeleri köke indirger (yangını → yangın ile aynı kök)
+
+    İndeksleme ve sorgular aynı fonksiyonu kullanmalı.
     
     Args:
         text (str): İşlenecek metin
@@ -25,15 +40,10 @@ def preprocess_text(text):
     Returns:
         list: İşlenmiş token'ların listesi
     """
-    tokens = text.lower().split()
+    return tokenize(text, get_stop_words())
 
-    # Noktalama ve stopword temizliği
-    filtered_tokens = [
-        t for t in tokens 
-        if (t not in stop_words and 
-            t not in punctuations and 
-            t.strip().isalpha() and  # strip() ile boşlukları temizle
-            len(t.strip()) > 1)  # Tek karakterli kelimeleri filtrele
-    ]
-    
-    return filtered_tokens 
\ No newline at end of file
+def preprocess_texts(texts):
+    """
+    preprocess_text'in batch hali: her metin için bir token listesi döner
+    """
+    return tokenize_many(texts, get_stop_words())
@@ -0,0 +1,81 @@
+import zlib
+
+def scan_member_offsets(warc_file, block_size=1024 ** 2):
+    """
+    Byte offsets where the gzip members of a WARC file start.
+
+    Deflate streams do not record their compressed length, so the only
+    reliable way to find member boundaries is to inflate them. This pass
+    runs entirely in zlib and throws the output away, which is much cheaper
+    than parsing the records.
+    """
+    offsets = [0]
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    # Absolute offset of the first byte of `data`
+    base = 0
+    with open(warc_file, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            while data:
+                decompressor.decompress(data)
+                if not decompressor.eof:
+                    base += len(data)
+                    break
+                unused = decompressor.unused_data
+                base += len(data) - len(unused)
+                offsets.append(base)
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                data = unused
+
+    # The last member ends at EOF; that is not the start of another one
+    if offsets[-1] >= base:
+        offsets.pop()
+    return offsets
+
+def split_into_chunks(offsets, file_size, chunk_bytes):
+    """
+    Group member offsets into (start, end) byte ranges of about
+    `chunk_bytes` each. Ranges always start on a member boundary and only
+    depend on the file and `chunk_bytes`, so a rerun sees the same ranges.
+    """
+    chunks = []
+    if not offsets:
+        return chunks
+    start = offsets[0]
+    for offset in offsets[1:]:
+        if offset - start >= chunk_bytes:
+            chunks.append((start, offset))
+            start = offset
+    chunks.append((start, file_size))
+    return chunks
+
+def chunk_key(warc_path, start):
+    """
+    Manifest key of the byte range of `warc_path` that starts at `start`
+    """
+    return f"{warc_path}#{start}"
+
+class RangeReader:
+    """
+    Read-only view of an open file that stops at `end`. tell() stays
+    absolute, so ArchiveIterator still reports offsets in the whole file.
+    """
+    def __init__(self, fh, end):
+        self.fh = fh
+        self.end = end
+
+    def read(self, size=-1):
+        remaining = self.end - self.fh.tell()
+        if remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.fh.read(size)
+
+    def tell(self):
+        return self.fh.tell()
+
+    def close(self):
+        pass
@@ -0,0 +1,105 @@
+import gzip
+import io
+import os
+import requests
+from warcio.archiveiterator import ArchiveIterator
+from domain_matcher import DomainMatcher
+
+# Sidecar indexes are kept here; the WARC files themselves are deleted
+# after processing
+INDEX_DIR = "warc-index"
+
+def get_index_path(warc_path, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, os.path.basename(warc_path) + ".cdx.gz")
+
+def build_index(warc_file, index_file):
+    """
+    Write a CDX-style sidecar for the response records of a WARC file.
+    One line per record: offset, length, host and URL, tab separated, in
+    file order. Returns the number of indexed records.
+    """
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    tmp_file = index_file + ".tmp"
+    count = 0
+    with open(warc_file, 'rb') as stream, gzip.open(tmp_file, 'wt', encoding='utf-8') as out:
+        records = ArchiveIterator(stream, no_record_parse=True)
+        for record in records:
+            if record.rec_type != 'response':
+                continue
+            url = record.rec_headers.get_header('WARC-Target-URI') or ''
+            host = DomainMatcher.get_host(url) or ''
+            out.write(f"{records.get_record_offset()}\t{records.get_record_length()}\t{host}\t{url}\n")
+            count += 1
+    # Only a finished index is ever visible under its real name
+    os.replace(tmp_file, index_file)
+    return count
+
+def load_index(index_file):
+    """
+    Returns a list of (offset, length, host, url)
+    """
+    entries = []
+    with gzip.open(index_file, 'rt', encoding='utf-8') as f:
+        for line in f:
+            offset, length, host, url = line.rstrip('\n').split('\t', 3)
+            entries.append((int(offset), int(length), host, url))
+    return entries
+
+def load_or_build_index(warc_file, index_file):
+    if not os.path.exists(index_file):
+        print(f"Building index {index_file}...")
+        count = build_index(warc_file, index_file)
+        print(f"Indexed {count} response records")
+    return load_index(index_file)
+
+def select_entries(entries, matcher, start_offset=0):
+    """
+    Index entries whose host matches, from `start_offset` on, in file order
+    """
+    return [
+        entry for entry in entries
+        if entry[0] >= start_offset and entry[2] and matcher.match_host(entry[2])
+    ]
+
+class LocalRecordReader:
+    """
+    Reads byte ranges of a local WARC file
+    """
+    def __init__(self, warc_file):
+        self.fh = open(warc_file, 'rb')
+
+    def read(self, offset, length):
+        self.fh.seek(offset)
+        return self.fh.read(length)
+
+    def close(self):
+        self.fh.close()
+
+class HttpRecordReader:
+    """
+    Reads byte ranges of a remote WARC file with HTTP range requests, so a
+    file that was indexed once never has to be downloaded again
+    """
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+
+    def read(self, offset, length):
+        headers = {"Range": f"bytes={offset}-{offset + length - 1}"}
+        response = self.session.get(self.url, headers=headers)
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise IOError(f"{self.url} does not support range requests")
+        return response.content
+
+    def close(self):
+        self.session.close()
+
+def read_record(reader, offset, length):
+    """
+    Decompress and parse the single record stored at offset/length
+    """
+    data = reader.read(offset, length)
+    for record in ArchiveIterator(io.BytesIO(data)):
+        return record
+    return None